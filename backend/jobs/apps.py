@@ -3,3 +3,44 @@ from django.apps import AppConfig
 class JobsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'jobs'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_migrate, post_save
+        from .cache import invalidate_on_job_change
+        from .gazetteer import gazetteer
+        from .sync import record_tombstone
+
+        gazetteer.load()
+        post_migrate.connect(_create_search_index, sender=self)
+        post_migrate.connect(_create_sort_indexes, sender=self)
+        post_migrate.connect(_backfill_city_key, sender=self)
+        # każda zmiana oferty unieważnia cache odpowiedzi (jobs/cache.py)
+        Job = self.get_model('Job')
+        post_save.connect(invalidate_on_job_change, sender=Job, dispatch_uid='jobs_cache_save')
+        post_delete.connect(invalidate_on_job_change, sender=Job, dispatch_uid='jobs_cache_delete')
+        # ślady usunięć dla /api/jobs/changes/ (jobs/sync.py)
+        post_delete.connect(record_tombstone, sender=Job, dispatch_uid='jobs_tombstone')
+
+def _create_search_index(sender, using='default', **kwargs):
+    from .search import ensure_search_index
+    ensure_search_index(using)
+
+def _create_sort_indexes(sender, using='default', **kwargs):
+    from .pagination import ensure_sort_indexes
+    ensure_sort_indexes(using)
+
+def _backfill_city_key(sender, using='default', **kwargs):
+    # oferty zapisane przed dodaniem city_key; jedno UPDATE na miasto
+    from django.db import connections
+    from .models import Job, fold_city
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        # tabeli (albo kolumny) nie ma, dopóki nie zrobiono makemigrations jobs
+        if 'jobs_job' not in connection.introspection.table_names(cursor):
+            return
+        columns = {c.name for c in connection.introspection.get_table_description(cursor, 'jobs_job')}
+    if 'city_key' not in columns:
+        return
+    stale = Job.objects.using(using).filter(city_key='').exclude(city='')
+    for city in stale.order_by().values_list('city', flat=True).distinct():
+        stale.filter(city=city).update(city_key=fold_city(city))
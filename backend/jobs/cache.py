@@ -0,0 +1,140 @@
+"""
+Cache odpowiedzi API ofert (featured, list) na frameworku cache Django.
+
+Klucz to nazwa widoku + znormalizowane parametry zapytania. Ważność wyznacza
+licznik wersji danych (`data_version`), podbijany po zapisie/usunięciu Job
+(sygnały) i po operacjach wsadowych omijających sygnały (bulk_ingest itp.) -
+zawsze po commicie transakcji.
+
+Do warunkowych GET list służy `watermark()`: max(updated_at) ofert i ostatni
+ślad usunięcia (JobTombstone.id) - oba odczytywane z indeksu, liczone najwyżej
+raz na wersję danych (i nie częściej niż co WATERMARK_TIMEOUT sekund), więc 304
+nie wymaga zapytania o same oferty. Wpis w cache pamięta watermark z chwili
+liczenia, a ETag odpowiedzi pochodzi z niego, nie z bieżącego stanu.
+
+Wpis ze starszą wersją nie jest od razu wyrzucany (stale-while-revalidate):
+jedno żądanie, które zdobędzie blokadę, liczy odpowiedź od nowa, a pozostałe
+w tym czasie dostają poprzednią. Przy braku wpisu pozostałe chwilę czekają
+na wynik zamiast równolegle odpytywać bazę.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import Job, JobTombstone
+
+VERSION_KEY = 'jobs:data-version'
+LOCK_TIMEOUT = 30
+WAIT_STEPS = 20
+WAIT_STEP = 0.05
+# zmiany z innych procesów (bez wspólnego cache) widać w watermarku po tylu sekundach
+WATERMARK_TIMEOUT = 10
+
+def data_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # po restarcie cache licznik startuje od czasu, żeby nie trafić w stare wpisy we współdzielonym cache
+        cache.add(VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+def bump_version():
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        data_version()
+        return cache.incr(VERSION_KEY)
+
+def invalidate():
+    """Unieważnia odpowiedzi po zatwierdzeniu bieżącej transakcji (od razu, gdy jej nie ma)."""
+    transaction.on_commit(bump_version)
+
+def invalidate_on_job_change(sender, **kwargs):
+    invalidate()
+
+def query_fingerprint(request, extra=()):
+    """Skrót parametrów zapytania niezależny od ich kolejności (puste wartości pomijane)."""
+    params = sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        for value in values
+        if value != '' and key != 'format'
+    )
+    raw = repr((request.get_host(), params, tuple(extra)))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+def cached_data(request, name, compute, timeout=None):
+    """
+    (dane odpowiedzi widoku `name`, watermark, z którego pochodzą) - z cache albo
+    z compute(). Odpowiedzi trzymane są JOBS_CACHE_TIMEOUT sekund; 0 wyłącza cache.
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'JOBS_CACHE_TIMEOUT', 300)
+    if not timeout:
+        return compute(), watermark()
+
+    key = f'jobs:resp:{name}:{query_fingerprint(request)}'
+    lock_key = key + ':lock'
+    version = data_version()
+    entry = cache.get(key)
+    if entry is not None and entry[0] == version:
+        return entry[2], entry[1]
+
+    if not cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+        if entry is not None:
+            return entry[2], entry[1]  # inne żądanie już odświeża - oddajemy poprzednią wersję
+        for _ in range(WAIT_STEPS):
+            time.sleep(WAIT_STEP)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[2], entry[1]
+        return compute(), watermark()
+    try:
+        # watermark przed compute(): dane mogą być najwyżej nowsze niż ETag, nigdy starsze
+        mark = watermark()
+        data = compute()
+        cache.set(key, (version, mark, data), timeout=timeout)
+        return data, mark
+    finally:
+        cache.delete(lock_key)
+
+def watermark():
+    """(max(updated_at), ostatni ślad usunięcia) - zmienia się przy każdym zapisie, dodaniu i usunięciu oferty."""
+    key = f'jobs:watermark:{data_version()}'
+    mark = cache.get(key)
+    if mark is None:
+        last = Job.objects.aggregate(last=Max('updated_at'))['last']
+        deleted = JobTombstone.objects.aggregate(last=Max('id'))['last']
+        mark = (last.isoformat() if last else None, deleted or 0)
+        cache.set(key, mark, timeout=WATERMARK_TIMEOUT)
+    return mark
+
+def make_etag(request, name, state):
+    """Silny ETag odpowiedzi: widok + parametry zapytania + format + stan danych."""
+    renderer = getattr(request, 'accepted_renderer', None)
+    raw = repr((name, query_fingerprint(request, [getattr(renderer, 'format', '')]), state))
+    return '"%s"' % hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+def conditional(request, etag, last_modified, build):
+    """
+    304, gdy If-None-Match / If-Modified-Since pasują (build() nie jest wtedy wołane),
+    w przeciwnym razie odpowiedź z build(). Obie dostają ETag (o ile build() nie ustawił
+    własnego) i Last-Modified, gdy go podano.
+    """
+    # Last-Modified ma rozdzielczość sekund - porównujemy na tej samej
+    timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = build()
+    if response.status_code in (200, 304):
+        if not response.has_header('ETag'):
+            response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+    return response
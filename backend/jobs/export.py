@@ -0,0 +1,110 @@
+"""
+Strumieniowy eksport ofert do NDJSON / CSV (/api/jobs/export/ i `manage.py export_jobs`).
+
+Wiersze czytane są przez .values_list().iterator(chunk_size), więc pamięć nie
+rośnie z rozmiarem tabeli, a pierwsze bajty idą do klienta, zanim baza skończy
+zwracać wynik. Filtr promienia działa na paczkach wierszy (baza zawęża je tylko
+prostokątem). Daty są w ISO 8601, pola listowe w CSV jako tekst JSON.
+"""
+import csv
+import json
+from datetime import date, datetime
+from itertools import islice
+
+from rest_framework.renderers import BaseRenderer
+
+from .utils import haversine_km_batch
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson jest opcjonalny
+    orjson = None
+
+EXPORT_FIELDS = [
+    'id', 'title', 'company', 'address', 'city', 'region', 'location', 'latitude', 'longitude', 'is_remote',
+    'salary_text', 'salary_min', 'salary_max', 'currency', 'contract_types', 'work_time', 'posted_at',
+    'duties', 'requirements', 'benefits', 'description', 'source_name', 'source_url', 'created_at', 'updated_at',
+]
+LIST_FIELDS = {'contract_types', 'duties', 'requirements', 'benefits'}
+CHUNK_SIZE = 2000
+LINES_PER_WRITE = 200
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Negocjacja formatu (?format=ndjson / Accept); treść eksportu generuje stream_export,
+    a render() obsługuje tylko odpowiedzi z błędem (400, 406...) - jako jedną linię JSON.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return dumps(data).encode('utf-8') + b'\n'
+
+class CSVRenderer(NDJSONRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+def _iso(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} nie jest serializowalny do JSON')
+
+def dumps(obj):
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=_iso)
+
+def iter_rows(queryset, fields=EXPORT_FIELDS, chunk_size=CHUNK_SIZE):
+    """Krotki wartości pól, czytane paczkami przez iterator."""
+    return queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+
+def ndjson_lines(rows, fields=EXPORT_FIELDS):
+    for row in rows:
+        yield dumps(dict(zip(fields, row))) + '\n'
+
+class _Echo:
+    """Bufor dla csv.writer, który zamiast zapisywać zwraca gotową linię."""
+    def write(self, value):
+        return value
+
+def csv_lines(rows, fields=EXPORT_FIELDS):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    lists = [i for i, name in enumerate(fields) if name in LIST_FIELDS]
+    for row in rows:
+        row = list(row)
+        for i in lists:
+            row[i] = dumps(row[i] if row[i] is not None else [])
+        yield writer.writerow(['' if v is None else v.isoformat() if isinstance(v, (datetime, date)) else v
+                               for v in row])
+
+def batched(lines, size=LINES_PER_WRITE):
+    """Łączy linie w większe kawałki - mniej wywołań zapisu przy tym samym strumieniu."""
+    buf = []
+    for line in lines:
+        buf.append(line)
+        if len(buf) >= size:
+            yield ''.join(buf)
+            buf = []
+    if buf:
+        yield ''.join(buf)
+
+def rows_within(rows, fields, center, chunk_size=CHUNK_SIZE):
+    """Wiersze w promieniu center = (lat, lon, km); dystans liczony wektorowo na paczkach."""
+    lat, lon, radius = center
+    i_lat, i_lon = fields.index('latitude'), fields.index('longitude')
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        _, mask = haversine_km_batch(lat, lon, [r[i_lat] for r in chunk], [r[i_lon] for r in chunk], radius)
+        yield from (row for row, inside in zip(chunk, mask.tolist()) if inside)
+
+def stream_export(queryset, fmt='ndjson', fields=EXPORT_FIELDS, chunk_size=CHUNK_SIZE, within=None):
+    """Generator tekstu eksportu w formacie 'ndjson' albo 'csv'; within = (lat, lon, km) zawęża do promienia."""
+    lines = csv_lines if fmt == 'csv' else ndjson_lines
+    rows = iter_rows(queryset, fields, chunk_size)
+    if within is not None:
+        rows = rows_within(rows, fields, within, chunk_size)
+    return batched(lines(rows, fields))
@@ -0,0 +1,173 @@
+"""
+Liczby ofert per facet dla ekranu wyszukiwania zaawansowanego (/api/jobs/facets/).
+
+Facety: city, region, is_remote, contract_type (elementy listy contract_types)
+i salary (przedziały po salary_max, a bez niego po salary_min). Każdy facet to
+jedno zapytanie GROUP BY na przefiltrowanym querysecie; contract_types jest
+rozwijane w SQL (json_each / jsonb_array_elements_text), a tylko na innych
+bazach przechodzimy po wierszach strumieniowo.
+
+Bez filtrów odpowiedź pochodzi z tabeli JobFacetCount, przeliczanej okresowo
+(refresh_facet_table, Celery beat co JOBS_FACETS_REFRESH_MINUTES) - czas
+odpowiedzi nie zależy wtedy od liczby ofert. Przeliczenie trzyma blokadę w
+cache, więc naraz działa tylko jedno; pozostałe żądania dostają w tym czasie
+poprzednie wiersze.
+"""
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import Case, CharField, Count, F, IntegerField, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import IsNull, LessThan
+from django.utils import timezone
+
+from .models import Job, JobFacetCount
+
+FACETS = ['city', 'region', 'is_remote', 'contract_type', 'salary']
+# granice przedziałów wynagrodzenia (PLN brutto / mies.)
+SALARY_BUCKETS = [5000, 8000, 12000, 16000, 20000]
+NO_SALARY = 'brak'
+
+REFRESH_LOCK = 'jobs:facets:refresh'
+# górna granica czasu przeliczenia; po niej blokada wygasa sama (np. po padnięciu procesu)
+REFRESH_LOCK_TIMEOUT = 300
+WAIT_STEPS = 20
+WAIT_STEP = 0.05
+
+# elementy tablicy contract_types podzapytania `s` (kolumna contract_types) jako kolumna `value`
+CONTRACT_SQL = {
+    'sqlite': (
+        "SELECT e.value, COUNT(*) FROM ({sub}) s, json_each("
+        "CASE WHEN json_type(s.contract_types) = 'array' THEN s.contract_types ELSE '[]' END) e "
+        "GROUP BY e.value"
+    ),
+    'postgresql': (
+        "SELECT e.value, COUNT(*) FROM ({sub}) s CROSS JOIN LATERAL jsonb_array_elements_text("
+        "CASE WHEN jsonb_typeof(s.contract_types) = 'array' THEN s.contract_types ELSE '[]'::jsonb END) e(value) "
+        "GROUP BY e.value"
+    ),
+}
+
+def salary_bucket_labels():
+    bounds = [0] + SALARY_BUCKETS
+    labels = [f'{lo}-{hi}' for lo, hi in zip(bounds, bounds[1:])]
+    return labels + [f'{SALARY_BUCKETS[-1]}+']
+
+def salary_bucket():
+    """Wyrażenie z etykietą przedziału wynagrodzenia oferty."""
+    amount = Coalesce('salary_max', 'salary_min', output_field=IntegerField())
+    labels = salary_bucket_labels()
+    whens = [When(IsNull(amount, True), then=Value(NO_SALARY))]
+    whens += [When(LessThan(amount, hi), then=Value(label)) for hi, label in zip(SALARY_BUCKETS, labels)]
+    return Case(*whens, default=Value(labels[-1]), output_field=CharField())
+
+def _grouped(queryset, expression):
+    rows = (
+        queryset.order_by().annotate(facet_value=expression)
+        .values('facet_value').annotate(n=Count('id')).values_list('facet_value', 'n')
+    )
+    return Counter(dict(rows))
+
+def _contract_counts(queryset):
+    queryset = queryset.order_by().values('contract_types')
+    connection = connections[queryset.db]
+    sql = CONTRACT_SQL.get(connection.vendor)
+    if sql is None:
+        counts = Counter()
+        for values in queryset.values_list('contract_types', flat=True).iterator(chunk_size=2000):
+            if isinstance(values, list):
+                counts.update(v for v in set(values) if isinstance(v, str))
+        return counts
+    sub, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(sql.format(sub=sub), params)
+        return Counter(dict(cursor.fetchall()))
+
+def compute_facets(queryset):
+    """{facet: Counter(wartość -> liczba ofert)} dla querysetu; jedno zapytanie na facet."""
+    remote = _grouped(queryset, F('is_remote'))
+    return {
+        'city': _grouped(queryset.exclude(city=''), F('city')),
+        'region': _grouped(queryset.exclude(region=''), F('region')),
+        'is_remote': Counter({'true' if k else 'false': v for k, v in remote.items()}),
+        'contract_type': _contract_counts(queryset),
+        'salary': _grouped(queryset, salary_bucket()),
+    }
+
+def format_facets(counts, total, limit):
+    """Odpowiedź API: wartości malejąco po liczbie (city/region obcięte do limit)."""
+    facets = {}
+    for facet in FACETS:
+        items = sorted(counts.get(facet, {}).items(), key=lambda kv: (-kv[1], kv[0]))
+        if facet in ('city', 'region'):
+            items = items[:limit]
+        facets[facet] = [{'value': value, 'count': n} for value, n in items]
+    return {'count': total, 'facets': facets}
+
+def refresh_facet_table():
+    """
+    Przelicza JobFacetCount dla całej tabeli ofert; zwraca liczbę zapisanych wierszy
+    albo None, gdy przeliczenie już trwa w innym procesie.
+    """
+    if not cache.add(REFRESH_LOCK, 1, timeout=REFRESH_LOCK_TIMEOUT):
+        return None
+    try:
+        counts = compute_facets(Job.objects.all())
+        counts['total'] = Counter({'': Job.objects.count()})
+        now = timezone.now()
+        rows = [
+            JobFacetCount(facet=facet, value=str(value)[:255], count=n, refreshed_at=now)
+            for facet, values in counts.items()
+            for value, n in values.items()
+        ]
+        with transaction.atomic():
+            JobFacetCount.objects.all().delete()
+            JobFacetCount.objects.bulk_create(rows, batch_size=1000)
+        return len(rows)
+    finally:
+        cache.delete(REFRESH_LOCK)
+
+def _refreshed_at():
+    return JobFacetCount.objects.filter(facet='total').values_list('refreshed_at', flat=True).first()
+
+def stored_facets(limit):
+    """
+    Facety bez filtrów z JobFacetCount. Tabelę dużo starszą niż interwał odświeżania
+    (beat nie działa) przelicza jedno żądanie, reszta dostaje stare wiersze. Przy pustej
+    tabeli pozostałe żądania chwilę czekają na przeliczenie, a potem liczą facety same,
+    bez zapisu.
+    """
+    refreshed_at = _refreshed_at()
+    max_age = timedelta(minutes=2 * getattr(settings, 'JOBS_FACETS_REFRESH_MINUTES', 10))
+    if refreshed_at is None or refreshed_at < timezone.now() - max_age:
+        if refresh_facet_table() is None and refreshed_at is None:
+            for _ in range(WAIT_STEPS):
+                time.sleep(WAIT_STEP)
+                if _refreshed_at() is not None:
+                    break
+            else:
+                jobs = Job.objects.all()
+                data = format_facets(compute_facets(jobs), jobs.count(), limit)
+                data['refreshed_at'] = timezone.now()
+                return data
+    counts = {facet: Counter() for facet in FACETS}
+    total, refreshed_at = 0, None
+    rows = JobFacetCount.objects.values_list('facet', 'value', 'count', 'refreshed_at')
+    # miast/województw może być dużo - z indeksu (facet, -count) bierzemy tylko pierwsze `limit`
+    parts = [rows.exclude(facet__in=['city', 'region'])]
+    parts += [rows.filter(facet=facet).order_by('-count', 'value')[:limit] for facet in ('city', 'region')]
+    for facet, value, n, at in (row for part in parts for row in part):
+        if facet == 'total':
+            total, refreshed_at = n, at
+        elif facet in counts:
+            counts[facet][value] = n
+    data = format_facets(counts, total, limit)
+    data['refreshed_at'] = refreshed_at
+    return data
+
+def facets_limit():
+    return getattr(settings, 'JOBS_FACETS_LIMIT', 50)
@@ -0,0 +1,89 @@
+"""
+Szybka ścieżka serializacji ofert dla gorących endpointów listowych.
+
+FastJobSerializer bierze pola z gotowego (już przyciętego przez ?fields=)
+JobSerializer/JobListSerializer, czyta wiersze przez .values() i składa słowniki
+z góry wyliczonymi konwerterami, z pominięciem maszynerii pól DRF. Daty
+formatuje ta sama metoda to_representation co DRF, więc wynik jest identyczny.
+FastJSONRenderer renderuje przez orjson, gdy jest zainstalowany.
+
+Włączane ustawieniem JOBS_FAST_SERIALIZER = True.
+"""
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson jest opcjonalny
+    orjson = None
+
+# pola, których to_representation zwraca wartość z bazy bez zmian
+_PASSTHROUGH = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.FloatField,
+    serializers.BooleanField,
+    serializers.JSONField,
+)
+
+class _Row(dict):
+    """Wiersz z .values() udający instancję modelu dla SerializerMethodField."""
+    __getattr__ = dict.get
+
+class FastJobSerializer:
+    def __init__(self, serializer):
+        model = serializer.Meta.model
+        columns = {f.name for f in model._meta.concrete_fields}
+        self.columns = []
+        self.plan = []
+        for name, field in serializer.fields.items():
+            if isinstance(field, serializers.SerializerMethodField):
+                method = getattr(serializer, field.method_name)
+                self.plan.append((name, None, method))
+                continue
+            source = field.source
+            if source not in columns:
+                raise ValueError(f'FastJobSerializer nie obsługuje pola {name!r}')
+            if source not in self.columns:
+                self.columns.append(source)
+            if isinstance(field, _PASSTHROUGH) and not getattr(field, 'binary', False):
+                convert = None
+            else:
+                convert = field.to_representation
+            self.plan.append((name, source, convert))
+        self.needs_row = any(source is None for _, source, _ in self.plan)
+
+    def values(self, queryset):
+        """Queryset zwracający słowniki z kolumnami potrzebnymi do serializacji."""
+        return queryset.values(*self.columns)
+
+    def serialize(self, rows):
+        plan = self.plan
+        out = []
+        for row in rows:
+            obj = _Row(row) if self.needs_row else row
+            item = {}
+            for name, source, convert in plan:
+                if source is None:
+                    item[name] = convert(obj)
+                    continue
+                value = row[source]
+                if value is None or convert is None:
+                    item[name] = value
+                else:
+                    item[name] = convert(value)
+            out.append(item)
+        return out
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer z orjson; wynik bajtowo zgodny z domyślnym (kompaktowym) renderem DRF."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except TypeError:
+            # typy, których orjson nie zna (lazy stringi, Decimal itp.) - standardowa ścieżka
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
@@ -0,0 +1,123 @@
+"""
+Gazetteer miast z jobs/data/cities.json trzymany w pamięci procesu.
+
+Plik jest wczytywany raz (JobsConfig.ready) i przeładowywany, gdy zmieni się
+jego mtime (sprawdzane najwyżej co CHECK_INTERVAL sekund). Wyszukiwanie po
+nazwie to słownik po nazwie znormalizowanej (małe litery, bez polskich znaków),
+a lista miast jest gotowym blobem JSON z ETagiem.
+
+Podpowiedzi (suggest) korzystają z posortowanej tablicy nazw i bisect; wyniki
+są rankowane po opcjonalnym polu "population". Dla prefiksów do SHORT_PREFIX
+znaków ranking jest liczony z góry, bo ich zakresy w tablicy są największe.
+"""
+import bisect
+import hashlib
+import heapq
+import json
+import threading
+import time
+import unicodedata
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+
+CHECK_INTERVAL = 5.0
+MAX_LIMIT = 50
+SHORT_PREFIX = 2
+
+# litery, które NFKD nie rozkłada na literę bazową + znak diakrytyczny
+_EXTRA_FOLD = str.maketrans({'ł': 'l', 'Ł': 'l', 'ß': 'ss'})
+
+def fold(name):
+    """'  Łódź ' -> 'lodz'"""
+    s = unicodedata.normalize('NFKD', (name or '').translate(_EXTRA_FOLD))
+    s = ''.join(ch for ch in s if not unicodedata.combining(ch))
+    return ' '.join(s.lower().split())
+
+class _State:
+    def __init__(self, mtime, cities):
+        self.mtime = mtime
+        self.cities = cities
+        self.blob = json.dumps(cities, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.etag = '"%s"' % hashlib.sha1(self.blob).hexdigest()
+
+        # kolejność rankingowa: najpierw większe miejscowości, przy remisie alfabetycznie
+        keyed = [(fold(c['name']), c) for c in cities]
+        keyed.sort(key=lambda kc: (-(kc[1].get('population') or 0), kc[0]))
+        self.ranked = [c for _, c in keyed]
+        self.by_name = {}
+        self.top_by_prefix = {}
+        for key, c in keyed:
+            self.by_name.setdefault(key, c)
+            for n in range(1, SHORT_PREFIX + 1):
+                if len(key) >= n:
+                    top = self.top_by_prefix.setdefault(key[:n], [])
+                    if len(top) < MAX_LIMIT:
+                        top.append(c)
+
+        entries = sorted((key, rank) for rank, (key, _) in enumerate(keyed))
+        self.names = [name for name, _ in entries]
+        self.ranks = [rank for _, rank in entries]
+
+_EMPTY = _State(None, [])
+
+class Gazetteer:
+    def __init__(self, path):
+        self.path = Path(path)
+        self._state = _EMPTY
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Wczytuje plik (jeśli zmienił się od ostatniego razu) i podmienia stan atomowo."""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                mtime = self.path.stat().st_mtime_ns
+            except FileNotFoundError:
+                self._state = _EMPTY
+                return
+            if mtime == self._state.mtime:
+                return
+            with self.path.open('r', encoding='utf-8') as f:
+                cities = json.load(f)
+            self._state = _State(mtime, cities)
+
+    def _current(self):
+        if time.monotonic() - self._checked_at >= CHECK_INTERVAL:
+            self.load()
+        return self._state
+
+    def lookup(self, name):
+        """Miasto ({'name', 'lat', 'lon'}) po nazwie, bez względu na wielkość liter i diakrytyki."""
+        return self._current().by_name.get(fold(name))
+
+    def suggest(self, query, limit=MAX_LIMIT):
+        """Do `limit` miast, których nazwa zaczyna się od query, od największych."""
+        state = self._current()
+        limit = max(0, min(limit, MAX_LIMIT))
+        prefix = fold(query)
+        if not prefix:
+            return state.ranked[:limit]
+        if len(prefix) <= SHORT_PREFIX:
+            return state.top_by_prefix.get(prefix, [])[:limit]
+        lo = bisect.bisect_left(state.names, prefix)
+        hi = bisect.bisect_left(state.names, prefix + '\U0010ffff', lo)
+        return [state.ranked[r] for r in heapq.nsmallest(limit, state.ranks[lo:hi])]
+
+    @property
+    def cities(self):
+        return self._current().cities
+
+    def blob(self):
+        """(bajty JSON pełnej listy miast, ETag)"""
+        state = self._current()
+        return state.blob, state.etag
+
+    def last_modified(self):
+        """Czas modyfikacji pliku miast (datetime UTC) albo None."""
+        mtime = self._current().mtime
+        return datetime.fromtimestamp(mtime / 1e9, tz=timezone.utc) if mtime is not None else None
+
+gazetteer = Gazetteer(Path(settings.BASE_DIR) / 'jobs' / 'data' / 'cities.json')
@@ -0,0 +1,39 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from jobs.utils import haversine_km, haversine_km_batch
+
+class Command(BaseCommand):
+    help = "Porównuje skalarny haversine_km z wektorowym haversine_km_batch. Użycie: --sizes 10000 100000 1000000"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000], help='Liczby punktów')
+        parser.add_argument('--radius', type=float, default=25.0, help='Promień w km')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        radius = options['radius']
+        lat0, lon0 = 52.2297, 21.0122  # Warszawa
+
+        for n in options['sizes']:
+            lats = rng.uniform(49.0, 54.9, n)
+            lons = rng.uniform(14.1, 24.2, n)
+            lat_list, lon_list = lats.tolist(), lons.tolist()
+
+            t0 = time.perf_counter()
+            scalar_hits = sum(1 for la, lo in zip(lat_list, lon_list) if haversine_km(lat0, lon0, la, lo) <= radius)
+            t_scalar = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            _, mask = haversine_km_batch(lat0, lon0, lats, lons, radius)
+            batch_hits = int(mask.sum())
+            t_batch = time.perf_counter() - t0
+
+            if scalar_hits != batch_hits:
+                self.stdout.write(self.style.ERROR(f"n={n}: niezgodne wyniki ({scalar_hits} vs {batch_hits})"))
+            self.stdout.write(
+                f"n={n:>9}  scalar={t_scalar * 1000:9.1f} ms  batch={t_batch * 1000:8.2f} ms  "
+                f"x{t_scalar / t_batch if t_batch else float('inf'):.0f}  trafień={batch_hits}"
+            )
@@ -0,0 +1,59 @@
+import time
+
+from bs4 import BeautifulSoup
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from .capture import iter_page_files, read_page
+from .scraper import extract_fields
+
+class Command(BaseCommand):
+    help = ("Mierzy czas parsowania HTML i ekstrakcji pól (extract_fields) na zapisanych stronach ofert "
+            "(.html, .html.gz, .html.zst; domyślnie magazyn JOBS_CAPTURE_DIR). "
+            "Użycie: bench_extraction [strony/ oferta.html] --repeat 5")
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help='Pliki stron lub katalogi z nimi')
+        parser.add_argument('--parser', default='lxml', choices=['lxml', 'html.parser'], help='Parser BeautifulSoup')
+        parser.add_argument('--repeat', type=int, default=5, help='Powtórzenia (liczy się najlepszy czas)')
+        parser.add_argument('--per-page', action='store_true', help='Wypisz czasy dla każdej strony')
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or [p for p in [getattr(settings, 'JOBS_CAPTURE_DIR', '')] if p]
+        files = list(iter_page_files(paths))
+        if not files:
+            raise CommandError("Brak plików HTML do pomiaru (podaj ścieżki albo ustaw JOBS_CAPTURE_DIR).")
+
+        total_parse = total_extract = 0.0
+        extract_times = []
+        for path in files:
+            html = read_page(path)
+            parse_time = extract_time = float('inf')
+            for _ in range(options['repeat']):
+                t0 = time.perf_counter()
+                soup = BeautifulSoup(html, options['parser'])
+                t1 = time.perf_counter()
+                fields = extract_fields(soup)
+                t2 = time.perf_counter()
+                parse_time = min(parse_time, t1 - t0)
+                extract_time = min(extract_time, t2 - t1)
+            total_parse += parse_time
+            total_extract += extract_time
+            extract_times.append(extract_time)
+            if options['per_page']:
+                found = sum(1 for value in fields.values() if value not in (None, '', []))
+                self.stdout.write(
+                    f"{path}: {len(html) / 1024:7.1f} KB  parse {parse_time * 1000:7.2f} ms  "
+                    f"ekstrakcja {extract_time * 1000:7.2f} ms  pól {found}/{len(fields)}"
+                )
+
+        n = len(files)
+        extract_times.sort()
+        p95 = extract_times[min(n - 1, int(n * 0.95))]
+        self.stdout.write(
+            f"Stron: {n} (parser {options['parser']})\n"
+            f"Parsowanie: {total_parse / n * 1000:.2f} ms/stronę\n"
+            f"Ekstrakcja: {total_extract / n * 1000:.2f} ms/stronę (mediana {extract_times[n // 2] * 1000:.2f}, "
+            f"p95 {p95 * 1000:.2f})\n"
+            f"Przepustowość ekstrakcji: {n / total_extract:.0f} stron/s"
+        )
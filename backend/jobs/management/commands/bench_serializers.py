@@ -0,0 +1,65 @@
+import random
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from jobs.fast import FastJobSerializer, FastJSONRenderer
+from jobs.models import Job
+from jobs.serializers import JobSerializer, JobListSerializer
+
+class _Rollback(Exception):
+    pass
+
+class Command(BaseCommand):
+    help = ("Porównuje JobSerializer + JSONRenderer z FastJobSerializer + FastJSONRenderer "
+            "na syntetycznych ofertach (wycofywanych po pomiarze). Użycie: --rows 200 1000 5000")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[200, 1000, 5000], help='Liczby ofert')
+        parser.add_argument('--repeat', type=int, default=5, help='Powtórzenia (liczy się najlepszy czas)')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, options):
+        sizes = sorted(options['rows'])
+        rng = random.Random(0)
+        Job.objects.bulk_create([
+            Job(
+                title=f'Programista Python {i}', company='Firma Sp. z o.o.', city='Łódź', region='Łódzkie',
+                location='Łódź, Łódzkie', latitude=51.75 + rng.random(), longitude=19.45 + rng.random(),
+                salary_text='10 000 - 15 000 zł brutto', salary_min=10000, salary_max=15000,
+                contract_types=['umowa o pracę', 'B2B'], posted_at=date(2025, 1, 1 + i % 28),
+                duties=['Pisanie kodu', 'Code review'], requirements=['Python', 'Django'], benefits=['Multisport'],
+                description='Opis stanowiska. ' * 40,
+            )
+            for i in range(sizes[-1])
+        ], batch_size=1000)
+
+        for serializer_class in (JobListSerializer, JobSerializer):
+            for n in sizes:
+                ids = list(Job.objects.order_by('-id').values_list('id', flat=True)[:n])
+                qs = Job.objects.filter(id__in=ids).order_by('-id')
+                drf_time = fast_time = float('inf')
+                for _ in range(options['repeat']):
+                    t0 = time.perf_counter()
+                    drf_bytes = JSONRenderer().render(serializer_class(list(qs), many=True).data)
+                    drf_time = min(drf_time, time.perf_counter() - t0)
+
+                    t0 = time.perf_counter()
+                    fast = FastJobSerializer(serializer_class())
+                    fast_bytes = FastJSONRenderer().render(fast.serialize(fast.values(qs)))
+                    fast_time = min(fast_time, time.perf_counter() - t0)
+
+                status = 'OK' if drf_bytes == fast_bytes else 'RÓŻNICA'
+                self.stdout.write(
+                    f"{serializer_class.__name__:18} n={n:>6}  drf={drf_time * 1000:8.1f} ms  "
+                    f"fast={fast_time * 1000:7.1f} ms  x{drf_time / fast_time:.1f}  bajty={status}"
+                )
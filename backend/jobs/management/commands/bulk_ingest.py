@@ -0,0 +1,264 @@
+import json
+import sys
+import time
+from collections import defaultdict
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connections, transaction
+from django.utils import timezone
+from jobs.cache import invalidate
+from jobs.models import Job, derive_location, fold_city
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:  # pragma: no cover - orjson jest opcjonalny
+    loads = json.loads
+
+JOB_FIELDS = {f.name for f in Job._meta.concrete_fields} - {'id', 'created_at', 'updated_at'}
+# pola porównywane z zapisaną ofertą - zmiana któregoś z nich przesuwa updated_at
+COMPARED_FIELDS = sorted(JOB_FIELDS - {'source_url', 'checked_at'})
+# kolumny INSERT-u nowych ofert
+INSERT_FIELDS = [Job._meta.get_field(name) for name in sorted(JOB_FIELDS) + ['created_at', 'updated_at']]
+# typy, których wartości sterownik bazy przyjmuje bez get_db_prep_save
+PASSTHROUGH_TYPES = {'CharField', 'TextField', 'URLField', 'IntegerField', 'FloatField', 'BooleanField'}
+
+def read_records(lines, errors):
+    """Rekordy z linii JSONL; błędne linie trafiają do `errors` jako ('linia N', komunikat)."""
+    for lineno, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = loads(line)
+        except ValueError as e:
+            errors.append((f'linia {lineno}', str(e)))
+            continue
+        if not isinstance(record, dict):
+            errors.append((f'linia {lineno}', 'rekord nie jest obiektem JSON'))
+            continue
+        yield record
+
+def clean_value(field, value):
+    """Wartość pola po to_python; ValidationError dla NULL w kolumnie NOT NULL i zbyt długiego tekstu."""
+    try:
+        value = field.to_python(value)
+    except ValidationError as e:
+        raise ValidationError([f'{field.name}: {message}' for message in e.messages])
+    if value is None and not field.null:
+        raise ValidationError(f'{field.name}: wartość nie może być pusta (null)')
+    if field.max_length and isinstance(value, str) and len(value) > field.max_length:
+        raise ValidationError(f'{field.name}: tekst dłuższy niż {field.max_length} znaków')
+    return value
+
+def build_job(record, source_name, now):
+    """
+    (wartości pól oferty z rekordu scrapera, pola obecne w rekordzie) albo None, gdy brak
+    source_url. Nadmiarowe klucze są pomijane; pól, których rekord nie ma, upsert nie
+    nadpisuje. Niepoprawna wartość pola to ValidationError.
+    """
+    if record.get('not_modified') or not record.get('source_url'):
+        return None
+    present = {k for k in record if k in JOB_FIELDS}
+    values = {name: clean_value(Job._meta.get_field(name), record[name]) for name in present}
+    if not values.get('source_name'):
+        values['source_name'] = source_name
+    if not values.get('location'):
+        values['location'] = derive_location(values.get('city', ''), values.get('region', ''))
+    values['city_key'] = fold_city(values.get('city'))
+    if values.get('checked_at') is None:
+        values['checked_at'] = now
+    return values, present
+
+def written_fields(values, present):
+    """Pola, które upsert zapisuje: obecne w rekordzie i wyliczone z nich."""
+    fields = present - {'source_url', 'checked_at'}
+    if 'city' in present:
+        fields.add('city_key')
+    if 'location' not in present and fields & {'city', 'region'}:
+        fields.add('location')
+    return fields
+
+def merge_existing(values, present, row):
+    """Pola do nadpisania w zapisanej ofercie `row`; puste, gdy nic się nie zmieniło."""
+    fields = written_fields(values, present)
+    if 'location' in fields and 'location' not in present:
+        # brakujące miasto/województwo bierzemy z zapisanej oferty
+        city = values['city'] if 'city' in present else row['city']
+        region = values['region'] if 'region' in present else row['region']
+        values['location'] = derive_location(city, region)
+    return {name for name in fields if values[name] != row[name]}
+
+def insert_jobs(rows, now, using='default'):
+    """
+    INSERT nowych ofert jednym executemany. bulk_create przygotowuje każdą wartość przez
+    kompilator zapytań i przy tysiącach wierszy to on, a nie baza, zajmuje większość czasu.
+    """
+    connection = connections[using]
+    # wartości domyślne i `now` przygotowane raz na paczkę (np. '[]' dla pustych list JSON)
+    prepared_now = Job._meta.get_field('created_at').get_db_prep_save(now, connection)
+    plan = []
+    for field in INSERT_FIELDS:
+        convert = None if field.get_internal_type() in PASSTHROUGH_TYPES else field.get_db_prep_save
+        if field.name in ('created_at', 'updated_at'):
+            missing = prepared_now
+        else:
+            missing = field.get_default()
+            missing = missing if convert is None else convert(missing, connection)
+        plan.append((field.name, convert, missing))
+    params = []
+    for values in rows:
+        row = []
+        for name, convert, missing in plan:
+            if name not in values:
+                row.append(missing)
+            elif convert is None:
+                row.append(values[name])
+            else:
+                value = values[name]
+                row.append(prepared_now if value is now else convert(value, connection))
+        params.append(row)
+    qn = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        qn(Job._meta.db_table),
+        ', '.join(qn(field.column) for field in INSERT_FIELDS),
+        ', '.join(['%s'] * len(INSERT_FIELDS)),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+def ingest(records, batch_size=1000, source_name='', errors=None):
+    """
+    Upsert rekordów paczkami, każda w jednej transakcji. Nowe oferty idą jednym
+    INSERT-em (executemany), zmienione - INSERT ... ON CONFLICT(source_url) DO UPDATE
+    na zestaw pól (zwykle jeden na paczkę) i tylko one dostają nowe updated_at;
+    niezmienionym odświeżamy samo checked_at. Rekordy z niepoprawnymi wartościami
+    trafiają do `errors` jako (source_url, komunikat) i nie są zapisywane.
+    Generator statystyk paczek: dict(rows, inserted, updated, unchanged, skipped, invalid, seconds);
+    skipped to rekordy bez source_url, 'not_modified' i powtórzone w paczce URL-e.
+    """
+    if errors is None:
+        errors = []
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, batch_size))
+        if not chunk:
+            return
+        t0 = time.perf_counter()
+        now = timezone.now()
+        jobs, invalid = {}, 0
+        for record in chunk:
+            try:
+                built = build_job(record, source_name, now)
+            except ValidationError as e:
+                errors.append((str(record.get('source_url') or '?'), '; '.join(e.messages)))
+                invalid += 1
+                continue
+            if built is not None:
+                # ten sam URL dwa razy w jednym INSERT to błąd w PostgreSQL - wygrywa ostatni
+                jobs[built[0]['source_url']] = built
+        with transaction.atomic():
+            existing = {
+                row['source_url']: row
+                for row in Job.objects.filter(source_url__in=list(jobs)).values('source_url', *COMPARED_FIELDS)
+            }
+            groups = defaultdict(list)
+            new, unchanged = [], []
+            for url, (values, present) in jobs.items():
+                if url not in existing:
+                    new.append((url, values, present))
+                    continue
+                changed = merge_existing(values, present, existing[url])
+                if changed:
+                    groups[frozenset(changed)].append(values)
+                else:
+                    unchanged.append(url)
+            inserted = failed = 0
+            if new:
+                try:
+                    with transaction.atomic():
+                        insert_jobs([values for _, values, _ in new], now, Job.objects.db)
+                    inserted = len(new)
+                except IntegrityError:
+                    # wiersz po wierszu: odróżniamy równoległy import tego samego URL-a od złych danych
+                    for url, values, present in new:
+                        try:
+                            with transaction.atomic():
+                                insert_jobs([values], now, Job.objects.db)
+                            inserted += 1
+                        except IntegrityError as e:
+                            if Job.objects.filter(source_url=url).exists():
+                                groups[frozenset(written_fields(values, present))].append(values)
+                            else:
+                                errors.append((url, str(e)))
+                                failed += 1
+            for fields, group in groups.items():
+                Job.objects.bulk_create(
+                    [Job(**values) for values in group],
+                    update_conflicts=True,
+                    unique_fields=['source_url'],
+                    update_fields=sorted(fields) + ['checked_at', 'updated_at'],
+                )
+            if unchanged:
+                Job.objects.filter(source_url__in=unchanged).update(checked_at=now)
+            if inserted or groups:
+                # ani INSERT, ani bulk_create nie wysyłają sygnałów - cache odpowiedzi unieważniamy sami
+                invalidate()
+        updated = sum(len(group) for group in groups.values())
+        yield dict(
+            rows=inserted + updated + len(unchanged),
+            inserted=inserted,
+            updated=updated,
+            unchanged=len(unchanged),
+            skipped=len(chunk) - len(jobs) - invalid,
+            invalid=invalid + failed,
+            seconds=time.perf_counter() - t0,
+        )
+
+class Command(BaseCommand):
+    help = ("Wczytuje oferty z pliku JSONL (rekord = wynik scrapera) i zapisuje je paczkami "
+            "przez upsert po source_url. Użycie: bulk_ingest oferty.jsonl [--batch-size 1000]")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Plik JSONL, '-' = stdin")
+        parser.add_argument('--batch-size', type=int, default=1000, help='Liczba rekordów w jednej transakcji')
+        parser.add_argument('--source', type=str, default='', help='source_name dla rekordów, które go nie mają')
+        parser.add_argument('--quiet', action='store_true', help='Nie wypisuj czasów poszczególnych paczek')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size musi być dodatnie")
+        try:
+            f = sys.stdin if options['path'] == '-' else open(options['path'], encoding='utf-8')
+        except OSError as e:
+            raise CommandError(f"Nie można odczytać {options['path']}: {e}")
+
+        errors = []
+        totals = dict(rows=0, inserted=0, updated=0, unchanged=0, skipped=0, seconds=0.0)
+        t0 = time.perf_counter()
+        try:
+            records = read_records(f, errors)
+            for n, batch in enumerate(ingest(records, options['batch_size'], options['source'], errors), 1):
+                for key in totals:
+                    totals[key] += batch[key]
+                if not options['quiet']:
+                    self.stdout.write(
+                        f"Paczka {n}: {batch['rows']} rekordów "
+                        f"(+{batch['inserted']} / ~{batch['updated']} / ={batch['unchanged']}) "
+                        f"w {batch['seconds'] * 1000:.1f} ms ({batch['rows'] / batch['seconds']:.0f} rek./s)"
+                    )
+        finally:
+            if f is not sys.stdin:
+                f.close()
+        elapsed = time.perf_counter() - t0
+
+        for where, message in errors[:20]:
+            self.stderr.write(f"{where}: {message}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Zapisano {totals['rows']} ofert w {elapsed:.2f} s "
+            f"({totals['rows'] / elapsed if elapsed else 0:.0f} rek./s; zapis {totals['seconds']:.2f} s): "
+            f"dodane {totals['inserted']}, zaktualizowane {totals['updated']}, bez zmian {totals['unchanged']}, "
+            f"pominięte {totals['skipped']}, błędne rekordy {len(errors)}"
+        ))
@@ -0,0 +1,179 @@
+"""
+Opcjonalny magazyn surowego HTML pobranych stron.
+
+Włączany ustawieniem JOBS_CAPTURE_DIR. Strony, z których nie udało się wyciągnąć
+oferty, zapisywane są zawsze (katalog failed/), poprawne - losowo, z
+prawdopodobieństwem JOBS_CAPTURE_SAMPLE (katalog sampled/). Plik nazywa się
+skrótem sha256 URL-a, więc kolejne pobranie tej samej strony nadpisuje poprzednie.
+Treść jest kompresowana (zstd, gdy jest pakiet zstandard, inaczej gzip).
+
+Kompresja i zapis odbywają się w wątku w tle; capture() tylko wrzuca stronę do
+kolejki i przy pełnej kolejce ją porzuca. Po przekroczeniu JOBS_CAPTURE_MAX_MB
+usuwane są najdawniej zapisane lub odczytane pliki (LRU).
+
+Zebrane strony służą jako korpus dla `manage.py bench_extraction`.
+"""
+import gzip
+import hashlib
+import os
+import queue
+import random
+import threading
+from collections import Counter, OrderedDict
+from pathlib import Path
+
+from django.conf import settings
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard jest opcjonalny
+    zstandard = None
+
+KINDS = ('failed', 'sampled')
+EXTENSIONS = ('.html', '.html.gz', '.html.zst')
+
+def url_key(url):
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+def read_page(path):
+    """HTML (bytes) z pliku magazynu albo zwykłego .html."""
+    data = Path(path).read_bytes()
+    name = str(path)
+    if name.endswith('.gz'):
+        return gzip.decompress(data)
+    if name.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError(f"{path}: do odczytu .zst potrzebny jest pakiet zstandard")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data
+
+def iter_page_files(paths):
+    """Pliki stron z listy plików i katalogów (katalogi przeszukiwane rekurencyjnie)."""
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            yield from sorted(p for p in path.rglob('*') if p.is_file() and p.name.endswith(EXTENSIONS))
+        elif path.is_file():
+            yield path
+
+class CaptureStore:
+    def __init__(self, root, max_bytes=200 * 1024 * 1024, sample_rate=0.01, queue_size=64):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.sample_rate = sample_rate
+        self.ext = '.html.zst' if zstandard else '.html.gz'
+        self.stats = Counter()
+        self._files = None  # OrderedDict ścieżka -> rozmiar, od najdawniej używanej
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._worker, name='capture-store', daemon=True)
+        self._thread.start()
+
+    def path_for(self, url, kind):
+        key = url_key(url)
+        return self.root / kind / key[:2] / (key + self.ext)
+
+    def capture(self, url, html, ok=True):
+        """Zleca zapis strony (nie blokuje). Poprawne strony są próbkowane, błędne zapisywane zawsze."""
+        if ok and random.random() >= self.sample_rate:
+            return False
+        if isinstance(html, str):
+            html = html.encode('utf-8')
+        try:
+            self._queue.put_nowait((url, html, 'sampled' if ok else 'failed'))
+        except queue.Full:
+            self.stats['dropped'] += 1
+            return False
+        return True
+
+    def get(self, url):
+        """Zapisany HTML strony albo None; odczyt odświeża pozycję w LRU."""
+        for kind in KINDS:
+            path = self.path_for(url, kind)
+            if path.exists():
+                os.utime(path)
+                with self._lock:
+                    if self._files is not None and path in self._files:
+                        self._files.move_to_end(path)
+                return read_page(path)
+        return None
+
+    def flush(self):
+        """Czeka, aż wszystkie zlecone zapisy trafią na dysk."""
+        self._queue.join()
+
+    def _compress(self, html):
+        if zstandard:
+            return zstandard.ZstdCompressor(level=10).compress(html)
+        return gzip.compress(html, compresslevel=6)
+
+    def _scan(self):
+        files = []
+        for kind in KINDS:
+            for path in (self.root / kind).rglob('*' + self.ext):
+                st = path.stat()
+                files.append((st.st_mtime, path, st.st_size))
+        files.sort()
+        self._files = OrderedDict((path, size) for _, path, size in files)
+        self._bytes = sum(self._files.values())
+
+    def _write(self, url, html, kind):
+        path = self.path_for(url, kind)
+        data = self._compress(html)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + '.tmp')
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._bytes += len(data) - self._files.pop(path, 0)
+            self._files[path] = len(data)
+            # strona, która raz się nie udała, a teraz przeszła (lub odwrotnie) - jedna kopia
+            other = self.path_for(url, 'sampled' if kind == 'failed' else 'failed')
+            if other in self._files:
+                self._bytes -= self._files.pop(other)
+                other.unlink(missing_ok=True)
+            while self._bytes > self.max_bytes and len(self._files) > 1:
+                old, size = self._files.popitem(last=False)
+                old.unlink(missing_ok=True)
+                self._bytes -= size
+                self.stats['evicted'] += 1
+        self.stats[kind] += 1
+
+    def _worker(self):
+        while True:
+            url, html, kind = self._queue.get()
+            try:
+                if self._files is None:
+                    self._scan()
+                self._write(url, html, kind)
+            except Exception as e:
+                # każdy błąd (nie tylko dyskowy) - wątek musi żyć, inaczej flush() zawiśnie
+                self.stats['errors'] += 1
+                print(f"⚠️ Nie udało się zapisać HTML {url}: {e!r}")
+            finally:
+                self._queue.task_done()
+
+_store = None
+_store_lock = threading.Lock()
+
+def default_capture_store():
+    """Wspólny CaptureStore procesu albo None, gdy JOBS_CAPTURE_DIR nie jest ustawione."""
+    global _store
+    root = getattr(settings, 'JOBS_CAPTURE_DIR', '')
+    if not root:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = CaptureStore(
+                root,
+                max_bytes=int(getattr(settings, 'JOBS_CAPTURE_MAX_MB', 200) * 1024 * 1024),
+                sample_rate=getattr(settings, 'JOBS_CAPTURE_SAMPLE', 0.01),
+            )
+    return _store
+
+def capture_page(url, html, ok=True):
+    """Skrót dla scrapera: zapisuje stronę, jeśli magazyn jest włączony."""
+    store = default_capture_store()
+    if store is not None and html:
+        store.capture(url, html, ok)
@@ -0,0 +1,85 @@
+from datetime import date, datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from jobs.models import Job
+from jobs.pagination import JobKeysetPagination
+from jobs.utils import bounding_box
+from jobs.views import JobFilter, JobViewSet
+
+# ?ordering= listy i przykładowa wartość kursora drugiej strony
+PAGE_ORDERINGS = {
+    '-created_at': datetime(2025, 1, 1, tzinfo=timezone.utc),
+    '-posted_at': date(2025, 1, 1),
+    '-salary_max': 12000,
+    '-salary_min': 8000,
+}
+
+def page_shapes():
+    """Zapytania JobKeysetPagination dla strony 1 i 2 - dokładnie te, które wykona lista."""
+    paginator = JobKeysetPagination()
+    factory = APIRequestFactory()
+    view = JobViewSet()
+    shapes = []
+    for ordering, value in PAGE_ORDERINGS.items():
+        for page, extra in (('1', {}), ('2', {'cursor': paginator.encode_cursor(value, 1000)})):
+            request = Request(factory.get('/api/jobs/', dict(extra, ordering=ordering)))
+            qs = paginator.page_queryset(Job.objects.all(), request, view)
+            shapes.append((f'lista {ordering} strona {page}', qs[:21]))
+    return shapes
+
+def query_shapes():
+    """Kształty zapytań JobViewSet (nazwa, queryset), które muszą korzystać z indeksów."""
+    jobs = Job.objects.all()
+    min_lat, max_lat, min_lon, max_lon = bounding_box(52.2297, 21.0122, 25)
+    since = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [
+        ('is_remote + -posted_at', jobs.filter(is_remote=True).order_by('-posted_at')[:21]),
+        ('city (prefiks)', JobFilter(data={'city': 'Pozn'}, queryset=jobs).qs),
+        ('min_salary', jobs.filter(salary_min__gte=8000)),
+        ('max_salary', jobs.filter(salary_max__lte=12000)),
+        ('ordering -salary_max', jobs.order_by('-salary_max')[:21]),
+        ('featured', jobs.order_by('-salary_max', '-posted_at', '-created_at')[:10]),
+        ('nearby bounding box', jobs.filter(latitude__range=(min_lat, max_lat), longitude__range=(min_lon, max_lon))),
+        ('posted_at od daty', jobs.filter(posted_at__gte=date(2025, 1, 1)).order_by('-posted_at')[:21]),
+        ('changes od kursora', jobs.filter(Q(updated_at__gt=since) | Q(updated_at=since, id__gt=1))
+            .order_by('updated_at', 'id').values_list('id', 'updated_at')[:501]),
+    ] + page_shapes()
+
+def full_scan(plan, vendor):
+    """Czy plan zawiera pełny skan tabeli jobs_job (bez indeksu)."""
+    for line in plan.splitlines():
+        if vendor == 'sqlite' and 'SCAN jobs_job' in line and 'INDEX' not in line:
+            return True
+        if vendor == 'postgresql' and 'Seq Scan on jobs_job' in line:
+            return True
+    return False
+
+class Command(BaseCommand):
+    help = "Uruchamia EXPLAIN dla kształtów zapytań API ofert i kończy się błędem, gdy któryś robi pełny skan tabeli."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Wypisz pełne plany')
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        failed = []
+        with transaction.atomic():
+            if vendor == 'postgresql':
+                # na małej tabeli planer i tak wybrałby seq scan; sprawdzamy, czy indeks w ogóle pasuje
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            for name, qs in query_shapes():
+                plan = qs.explain()
+                bad = full_scan(plan, vendor)
+                if bad:
+                    failed.append(name)
+                style = self.style.ERROR if bad else self.style.SUCCESS
+                self.stdout.write(style(f"{'FULL SCAN' if bad else 'OK':9} {name}"))
+                if options['verbose_plans'] or bad:
+                    self.stdout.write('    ' + plan.replace('\n', '\n    '))
+        if failed:
+            raise CommandError(f"Pełny skan tabeli w: {', '.join(failed)}")
@@ -0,0 +1,62 @@
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from jobs.models import Job
+from .crawler import Crawler
+from .scrape_jobs import save_job
+
+class Command(BaseCommand):
+    help = ("Przechodzi strony z listami ofert, wykrywa nowe oferty (których source_url nie ma w bazie) "
+            "i scrapuje je. Użycie: --start-url <lista> [--start-url ...] [--per-host 2] [--delay 1.0]")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start-url', action='append', default=[], help='URL strony z listą ofert (można powtarzać)')
+        parser.add_argument('--start-file', type=str, help='Plik z URL-ami list (jeden na linię)')
+        parser.add_argument('--source', type=str, default='pracuj.pl', help='Nazwa źródła (opcjonalnie)')
+        parser.add_argument('--max-listing-pages', type=int, default=50, help='Maks. stron paginacji na listę')
+        parser.add_argument('--per-host', type=int, default=2, help='Równoległe żądania na host')
+        parser.add_argument('--delay', type=float, default=1.0, help='Minimalny odstęp między żądaniami do hosta (s)')
+        parser.add_argument('--offer-workers', type=int, default=4, help='Równoległe pobierania ofert')
+        parser.add_argument('--full', action='store_true', help='Nie przerywaj paginacji po stronie bez nowych ofert')
+        parser.add_argument('--dry-run', action='store_true', help='Tylko wykryj nowe oferty, nie scrapuj')
+
+    def handle(self, *args, **options):
+        start_urls = list(options['start_url'])
+        if options['start_file']:
+            try:
+                with open(options['start_file'], encoding='utf-8') as f:
+                    start_urls += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+            except OSError as e:
+                raise CommandError(f"Nie można odczytać {options['start_file']}: {e}")
+        if not start_urls:
+            raise CommandError("Podaj --start-url albo --start-file")
+
+        known = set(Job.objects.filter(source_url__gt='').values_list('source_url', flat=True).iterator())
+        crawler = Crawler(
+            start_urls,
+            known_urls=known,
+            save=None if options['dry_run'] else save_job,
+            max_listing_pages=options['max_listing_pages'],
+            per_host=options['per_host'],
+            delay=options['delay'],
+            offer_workers=options['offer_workers'],
+            incremental=not options['full'],
+            source_name=options['source'],
+            discover_only=options['dry_run'],
+        )
+
+        t0 = time.perf_counter()
+        stats = asyncio.run(crawler.run())
+        elapsed = time.perf_counter() - t0
+
+        if options['dry_run']:
+            for url in crawler.discovered:
+                self.stdout.write(url)
+        for key in sorted(stats):
+            self.stdout.write(f"{key}: {stats[key]}")
+        rate = 3600.0 * stats['offers_saved'] / elapsed if elapsed else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f"Nowych ofert: {stats['new_offers']}, zapisanych: {stats['offers_saved']} "
+            f"w {elapsed:.1f} s ({rate:.0f} ofert/h)."
+        ))
@@ -0,0 +1,174 @@
+"""
+Asynchroniczny crawler stron z listami ofert.
+
+Przechodzi strony wyników wyszukiwania (z linkami "następna strona"), wyciąga
+linki do ofert, odrzuca te, które już są w bazie (Job.source_url) albo zostały
+już zauważone w tym przebiegu, i przekazuje nowe do pobierania przez
+TieredFetcher. Strony list pobiera zwykłym HTTP, bez przeglądarki.
+
+Na każdy host przypada najwyżej `per_host` równoległych żądań i co najmniej
+`delay` sekund między kolejnymi żądaniami. Listy są zwykle posortowane od
+najnowszych, więc przy `incremental=True` crawler przestaje iść w głąb
+paginacji, gdy strona nie przyniosła żadnej nowej oferty.
+"""
+import asyncio
+import re
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urldefrag, urlparse
+
+from bs4 import BeautifulSoup
+
+from .fetcher import TieredFetcher, make_session
+
+# wzorce linków do ofert i selektory "następnej strony" per portal; DEFAULT dla pozostałych
+SOURCES = {
+    'pracuj.pl': {
+        'offer': re.compile(r'/praca/[^/?#]+,oferta,\d+'),
+        'next': 'a[rel="next"], a[data-test="bottom-pagination-button-next"]',
+    },
+    'DEFAULT': {
+        'offer': re.compile(r'(oferta|offer|job)[^/]*[/,-]\w+', re.I),
+        'next': 'a[rel="next"], a.next, li.next a, a[aria-label*="Następna"], a[aria-label*="Next"]',
+    },
+}
+
+def source_rules(url):
+    host = urlparse(url).netloc.lower()
+    for name, rules in SOURCES.items():
+        if name != 'DEFAULT' and (host == name or host.endswith('.' + name)):
+            return rules
+    return SOURCES['DEFAULT']
+
+def extract_listing_links(html, page_url):
+    """(linki do ofert, link do następnej strony albo None) ze strony listy."""
+    rules = source_rules(page_url)
+    soup = BeautifulSoup(html, 'lxml')
+    offers = []
+    for a in soup.find_all('a', href=True):
+        href = urldefrag(urljoin(page_url, a['href']))[0]
+        if href.startswith('http') and rules['offer'].search(urlparse(href).path):
+            offers.append(href)
+    next_el = soup.select_one(rules['next'])
+    next_url = urljoin(page_url, next_el['href']) if next_el and next_el.get('href') else None
+    return list(dict.fromkeys(offers)), next_url
+
+class HostLimiter:
+    """Limit równoległości i odstęp między żądaniami dla każdego hosta osobno."""
+
+    def __init__(self, per_host=2, delay=1.0):
+        self.per_host = per_host
+        self.delay = delay
+        self._sem = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+        self._locks = defaultdict(asyncio.Lock)
+        self._next_slot = defaultdict(float)
+
+    async def __call__(self, url, func, *args):
+        host = urlparse(url).netloc.lower()
+        async with self._sem[host]:
+            async with self._locks[host]:
+                wait = self._next_slot[host] - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._next_slot[host] = time.monotonic() + self.delay
+            return await asyncio.to_thread(func, *args)
+
+class Crawler:
+    def __init__(self, start_urls, known_urls=(), save=None, max_listing_pages=50, per_host=2,
+                 delay=1.0, offer_workers=4, incremental=True, source_name='pracuj.pl',
+                 fetcher_factory=TieredFetcher, session=None, timeout=10, discover_only=False):
+        self.start_urls = list(dict.fromkeys(start_urls))
+        self.seen = set(known_urls)
+        self.save = save
+        self.max_listing_pages = max_listing_pages
+        self.offer_workers = max(1, offer_workers)
+        self.incremental = incremental
+        self.source_name = source_name
+        self.fetcher_factory = fetcher_factory
+        self.session = session or make_session()
+        self.timeout = timeout
+        self.limiter = HostLimiter(per_host, delay)
+        self.discover_only = discover_only
+        self._db = ThreadPoolExecutor(max_workers=1, thread_name_prefix='crawler-db')
+        self.discovered = []
+        self.stats = Counter()
+
+    def _get_listing(self, url):
+        resp = self.session.get(url, timeout=self.timeout)
+        resp.raise_for_status()
+        return resp.text
+
+    async def _walk(self, start_url, offers):
+        url, pages = start_url, 0
+        visited = set()
+        while url and url not in visited and pages < self.max_listing_pages:
+            visited.add(url)
+            pages += 1
+            try:
+                html = await self.limiter(url, self._get_listing, url)
+            except Exception as e:
+                print(f"❌ Lista nie pobrana: {url} :: {e}")
+                self.stats['listing_errors'] += 1
+                return
+            self.stats['listing_pages'] += 1
+            links, url = extract_listing_links(html, url)
+            new = [u for u in links if u not in self.seen]
+            self.seen.update(new)
+            self.stats['links'] += len(links)
+            self.stats['new_offers'] += len(new)
+            self.discovered.extend(new)
+            if not self.discover_only:
+                for u in new:
+                    await offers.put(u)
+            if self.incremental and links and not new:
+                break
+
+    async def _fetch_offer(self, fetcher, url):
+        # wyjątek nie może zakończyć workera - ścieżki przeglądania czekałyby wtedy na offers.put
+        try:
+            data = await self.limiter(url, fetcher.fetch, url)
+        except Exception as e:
+            print(f"❌ Oferta nie pobrana: {url} :: {e!r}")
+            data = None
+        if not data:
+            self.stats['offer_errors'] += 1
+            return
+        self.stats['offers_fetched'] += 1
+        if self.save is not None:
+            try:
+                # zapisy z jednego wątku: SQLite nie znosi równoległych transakcji zapisu
+                await asyncio.get_running_loop().run_in_executor(self._db, self.save, data, url)
+            except Exception as e:
+                print(f"❌ Oferta nie zapisana: {url} :: {e!r}")
+                self.stats['save_errors'] += 1
+                return
+            self.stats['offers_saved'] += 1
+
+    async def _offer_worker(self, offers):
+        fetcher = self.fetcher_factory(source_name=self.source_name)
+        try:
+            while True:
+                url = await offers.get()
+                try:
+                    if url is None:
+                        return
+                    await self._fetch_offer(fetcher, url)
+                finally:
+                    offers.task_done()
+        finally:
+            for tier, n in fetcher.tiers.items():
+                self.stats[f'tier_{tier}'] += n
+            await asyncio.to_thread(fetcher.close)
+
+    async def run(self):
+        offers = asyncio.Queue(maxsize=self.offer_workers * 10)
+        n_workers = 0 if self.discover_only else self.offer_workers
+        workers = [asyncio.create_task(self._offer_worker(offers)) for _ in range(n_workers)]
+        await asyncio.gather(*(self._walk(u, offers) for u in self.start_urls))
+        for _ in workers:
+            await offers.put(None)
+        await asyncio.gather(*workers)
+        self.session.close()
+        self._db.shutdown()
+        return self.stats
@@ -0,0 +1,87 @@
+"""
+Pula równoległych pobierań ofert z długo żyjącymi przeglądarkami.
+
+Każdy wątek roboczy ma własny TieredFetcher: własną sesję HTTP i własną
+instancję Chrome, uruchamianą dopiero, gdy strona wymaga renderowania, i
+wymienianą po `recycle_after` stronach albo po nieudanej stronie. Wyniki
+wracają do wątku wywołującego, więc zapis do bazy odbywa się w jednym miejscu.
+"""
+import queue
+import threading
+import time
+from collections import Counter
+
+from .fetcher import TieredFetcher
+
+class WorkerStats:
+    def __init__(self, name):
+        self.name = name
+        self.pages = 0
+        self.errors = 0
+        self.drivers_started = 0
+        self.busy_seconds = 0.0
+        self.tiers = Counter()
+
+    @property
+    def pages_per_minute(self):
+        return 60.0 * self.pages / self.busy_seconds if self.busy_seconds else 0.0
+
+class DriverPool:
+    def __init__(self, workers=4, recycle_after=50, source_name='pracuj.pl', http_first=True,
+                 fetcher_factory=TieredFetcher):
+        self.workers = max(1, workers)
+        self.recycle_after = max(1, recycle_after)
+        self.source_name = source_name
+        self.http_first = http_first
+        self.fetcher_factory = fetcher_factory
+        self.stats = [WorkerStats(f'worker-{i + 1}') for i in range(self.workers)]
+        self.log = []
+
+    def _work(self, stats, urls, results, validators):
+        fetcher = self.fetcher_factory(
+            source_name=self.source_name,
+            http_first=self.http_first,
+            recycle_after=self.recycle_after,
+        )
+        try:
+            while True:
+                url = urls.get()
+                if url is None:
+                    return
+                t0 = time.perf_counter()
+                try:
+                    data = fetcher.fetch(url, validators.get(url))
+                except Exception as e:
+                    # każdy URL musi dać wynik, inaczej run() czekałby na niego w nieskończoność
+                    print(f"❌ {stats.name}: błąd dla {url}: {e!r}")
+                    data = {}
+                stats.busy_seconds += time.perf_counter() - t0
+                stats.pages += 1
+                if not data:
+                    stats.errors += 1
+                results.put((url, data))
+        finally:
+            stats.drivers_started = fetcher.drivers_started
+            stats.tiers = fetcher.tiers
+            self.log.extend(fetcher.log)
+            fetcher.close()
+
+    def run(self, urls, validators=None):
+        """Generator par (url, dane); puste dane oznaczają nieudaną stronę.
+        validators: {url: walidatory zapisanej oferty} do żądań warunkowych."""
+        validators = validators or {}
+        urls = list(dict.fromkeys(u.strip() for u in urls if u and u.strip()))
+        todo = queue.Queue()
+        results = queue.Queue()
+        for url in urls:
+            todo.put(url)
+        threads = []
+        for stats in self.stats[:min(self.workers, len(urls)) or 1]:
+            todo.put(None)
+            t = threading.Thread(target=self._work, args=(stats, todo, results, validators), name=stats.name, daemon=True)
+            t.start()
+            threads.append(t)
+        for _ in urls:
+            yield results.get()
+        for t in threads:
+            t.join()
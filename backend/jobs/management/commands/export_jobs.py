@@ -0,0 +1,44 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from jobs.export import CHUNK_SIZE, stream_export
+from jobs.models import Job
+from jobs.views import JobFilter, radius_center, within_bounding_box
+
+class Command(BaseCommand):
+    help = ("Eksportuje oferty strumieniowo do NDJSON lub CSV, z filtrami jak w /api/jobs/. "
+            "Użycie: export_jobs --format csv --output oferty.csv --filter city=Łódź --filter is_remote=true")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=['ndjson', 'csv'], default='ndjson', help='Format wyjścia')
+        parser.add_argument('--output', default='-', help="Plik wyjściowy, '-' = stdout")
+        parser.add_argument('--filter', action='append', default=[], metavar='POLE=WARTOŚĆ',
+                            help='Parametr jak w /api/jobs/ (city, region, is_remote, min_salary, max_salary, radius_km); '
+                                 'można powtarzać')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Wiersze pobierane z bazy naraz')
+
+    def handle(self, *args, **options):
+        params = {}
+        for item in options['filter']:
+            key, sep, value = item.partition('=')
+            if not sep:
+                raise CommandError(f"Filtr musi mieć postać pole=wartość: {item}")
+            params[key.strip()] = value.strip()
+        filterset = JobFilter(data=params, queryset=Job.objects.order_by('id'))
+        if not filterset.is_valid():
+            raise CommandError(f"Niepoprawne filtry: {dict(filterset.errors)}")
+
+        queryset = filterset.qs
+        center = radius_center(params)
+        if center is not None:
+            queryset = within_bounding_box(queryset, *center)
+
+        out = sys.stdout if options['output'] == '-' else open(options['output'], 'w', encoding='utf-8', newline='')
+        try:
+            for chunk in stream_export(queryset, options['format'], chunk_size=options['chunk_size'], within=center):
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        if out is not sys.stdout:
+            self.stderr.write(self.style.SUCCESS(f"Zapisano eksport do {options['output']}"))
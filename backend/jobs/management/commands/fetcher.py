@@ -0,0 +1,163 @@
+"""
+Warstwowe pobieranie ofert: najpierw zwykły HTTP, przeglądarka tylko w razie potrzeby.
+
+Tier "http": współdzielona sesja requests (keep-alive, pula połączeń) + parser lxml.
+Jeśli strona nie ma wymaganych pól (tytułu z <h1> albo JSON-LD JobPosting),
+fetcher eskaluje do tier "browser", czyli Selenium, z przeglądarką
+uruchamianą leniwie i wymienianą co `recycle_after` stron.
+Każdy URL trafia do `log` razem z tierem, który go obsłużył, i czasem.
+
+Przy odświeżaniu znanej oferty fetch() dostaje jej walidatory (ETag,
+Last-Modified, content_hash) i wysyła żądanie warunkowe. Odpowiedź 304 albo
+treść o tym samym skrócie kończy pracę bez wyciągania pól oferty: wynik to
+{'not_modified': True, ...} z aktualnymi walidatorami (tier "not_modified").
+content_hash liczony jest ze spłaszczonego tekstu strony (page_content_hash),
+więc zgadza się niezależnie od tego, który tier pobrał ofertę poprzednio.
+
+Tiery parsują stronę bez geokodowania; współrzędne dostaje dopiero wynik tieru,
+który wygrał, więc strona eskalowana do przeglądarki nie jest geokodowana dwa razy.
+
+Przy włączonym JOBS_CAPTURE_DIR pobrany HTML trafia do magazynu (capture.py):
+strony bez wymaganych pól zawsze, pozostałe próbkowane.
+"""
+import time
+from collections import Counter
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from .capture import capture_page, default_capture_store
+from .scraper import geocode_offer, make_driver, page_content_hash, page_texts, parse_offer, scrape_job
+
+USER_AGENT = (
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/124.0 Safari/537.36'
+)
+
+def make_session(pool_size=10):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=1)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({
+        'User-Agent': USER_AGENT,
+        'Accept': 'text/html,application/xhtml+xml',
+        'Accept-Language': 'pl-PL,pl;q=0.9,en;q=0.5',
+    })
+    return session
+
+def has_required_fields(data):
+    """Czy wynik z HTTP jest kompletny, czy trzeba renderować stronę w przeglądarce."""
+    return bool(data and data.get('title'))
+
+class TieredFetcher:
+    def __init__(self, source_name='pracuj.pl', http_first=True, recycle_after=50, timeout=10,
+                 session=None, driver_factory=make_driver, scrape=scrape_job):
+        self.source_name = source_name
+        self.http_first = http_first
+        self.recycle_after = max(1, recycle_after)
+        self.timeout = timeout
+        self.session = session or make_session()
+        self.driver_factory = driver_factory
+        self.scrape = scrape
+        self.driver = None
+        self.driver_pages = 0
+        self.drivers_started = 0
+        self.tiers = Counter()
+        self.seconds = Counter()
+        self.log = []
+
+    def fetch_http(self, url, validators=None):
+        validators = validators or {}
+        headers = {}
+        if validators.get('http_etag'):
+            headers['If-None-Match'] = validators['http_etag']
+        if validators.get('http_last_modified'):
+            headers['If-Modified-Since'] = validators['http_last_modified']
+        resp = self.session.get(url, timeout=self.timeout, headers=headers)
+        fresh = {
+            'http_etag': resp.headers.get('ETag', validators.get('http_etag', '')),
+            'http_last_modified': resp.headers.get('Last-Modified', validators.get('http_last_modified', '')),
+        }
+        if resp.status_code == 304:
+            return dict(fresh, not_modified=True, content_hash=validators.get('content_hash', ''))
+        if resp.status_code != 200 or 'html' not in resp.headers.get('Content-Type', 'text/html'):
+            return {}
+        soup = BeautifulSoup(resp.content, 'lxml')
+        texts = page_texts(soup)
+        content_hash = page_content_hash(soup, texts[0])
+        if content_hash == validators.get('content_hash'):
+            return dict(fresh, not_modified=True, content_hash=content_hash)
+        data = parse_offer(soup, url, self.source_name, texts, geocode=False)
+        capture_page(url, resp.content, ok=has_required_fields(data))
+        if data:
+            data.update(fresh, content_hash=content_hash)
+        return data
+
+    def fetch_browser(self, url):
+        if self.driver is None or self.driver_pages >= self.recycle_after:
+            self.close_driver()
+            self.driver = self.driver_factory()
+            self.drivers_started += 1
+        self.driver_pages += 1
+        data = self.scrape(url, source_name=self.source_name, driver=self.driver, geocode=False)
+        if not data:
+            # przeglądarka mogła paść - następna strona dostanie nową
+            self.close_driver()
+        return data
+
+    def fetch(self, url, validators=None):
+        """Dane oferty (pusty słownik, gdy żaden tier nie dał rady).
+        validators: zapisane http_etag / http_last_modified / content_hash oferty."""
+        t0 = time.perf_counter()
+        data, tier = {}, 'failed'
+        if self.http_first:
+            try:
+                data = self.fetch_http(url, validators)
+            except requests.RequestException as e:
+                print(f"⚠️ HTTP nie powiodło się dla {url}: {e}")
+            except Exception as e:
+                # błąd parsera (np. niepoprawna data na stronie) - spróbujemy przeglądarką
+                print(f"⚠️ Nie udało się przetworzyć {url} z HTTP: {e!r}")
+                data = {}
+            if data.get('not_modified'):
+                tier = 'not_modified'
+            elif has_required_fields(data):
+                tier = 'http'
+        if tier == 'failed':
+            try:
+                data = self.fetch_browser(url)
+            except Exception as e:
+                print(f"❌ Przeglądarka nie powiodła się dla {url}: {e}")
+                self.close_driver()
+                data = {}
+            if data:
+                tier = 'browser'
+        if tier in ('http', 'browser'):
+            # jedno geokodowanie na ofertę, z danych tieru, który wygrał (Nominatim: 1 zapytanie/s)
+            try:
+                geocode_offer(data)
+            except Exception as e:
+                print(f"⚠️ Geokodowanie nie powiodło się dla {url}: {e!r}")
+        elapsed = time.perf_counter() - t0
+        self.tiers[tier] += 1
+        self.seconds[tier] += elapsed
+        self.log.append((url, tier, elapsed))
+        return data if tier != 'failed' else {}
+
+    def close_driver(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+        self.driver = None
+        self.driver_pages = 0
+
+    def close(self):
+        self.close_driver()
+        self.session.close()
+        store = default_capture_store()
+        if store is not None:
+            store.flush()
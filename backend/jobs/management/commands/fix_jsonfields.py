@@ -1,32 +1,85 @@
 from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+from jobs.cache import invalidate
 from jobs.models import Job
 
+FIELDS = ['requirements', 'duties', 'benefits', 'contract_types']
+
+# "wartość nie jest tablicą JSON" w SQL danej bazy; NULL, tekst, obiekt, liczba i JSON null też się liczą.
+# W SQLite json_type() na niepoprawnym JSON-ie rzuca błąd, stąd CASE zamiast samego OR.
+BROKEN_SQL = {
+    'sqlite': "{col} IS NULL OR CASE WHEN json_valid({col}) THEN json_type({col}) <> 'array' ELSE 1 END",
+    'postgresql': "{col} IS NULL OR jsonb_typeof({col}) <> 'array'",
+    'mysql': "{col} IS NULL OR JSON_TYPE({col}) <> 'ARRAY'",
+}
+
 class Command(BaseCommand):
-    help = "Naprawia pola JSONField w modelu Job, ustawiając [] tam, gdzie są niepoprawne wartości."
+    help = ("Naprawia pola JSONField w modelu Job, ustawiając [] tam, gdzie nie ma tablicy JSON. "
+            "Jeden UPDATE na kolumnę; bez funkcji JSON w bazie - przejście strumieniowe. "
+            "Użycie: fix_jsonfields [--dry-run] [--chunk-size 2000]")
 
-    def handle(self, *args, **options):
-        updated_count = 0
-        for job in Job.objects.all():
-            changed = False
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Tylko policz niepoprawne wartości')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Wielkość paczki w trybie strumieniowym')
+        parser.add_argument('--streaming', action='store_true',
+                            help='Wymuś przejście strumieniowe zamiast UPDATE w SQL')
 
-            if not isinstance(job.requirements, list):
-                job.requirements = []
-                changed = True
+    def handle(self, *args, **options):
+        counts = None
+        if not options['streaming'] and connection.vendor in BROKEN_SQL:
+            try:
+                counts = self.fix_in_sql(options['dry_run'])
+            except DatabaseError as e:
+                # np. SQLite skompilowany bez JSON1
+                self.stderr.write(f"UPDATE w SQL niedostępny ({e}), przechodzę strumieniowo.")
+        if counts is None:
+            counts = self.fix_streaming(options['dry_run'], max(1, options['chunk_size']))
 
-            if not isinstance(job.duties, list):
-                job.duties = []
-                changed = True
+        if not options['dry_run'] and any(counts.values()):
+            invalidate()
+        for field in FIELDS:
+            self.stdout.write(f"{field}: {counts[field]}")
+        verb = "Do naprawy" if options['dry_run'] else "Naprawiono"
+        self.stdout.write(self.style.SUCCESS(f"{verb}: {sum(counts.values())} wartości w {len(FIELDS)} kolumnach."))
 
-            if not isinstance(job.benefits, list):
-                job.benefits = []
-                changed = True
+    def fix_in_sql(self, dry_run):
+        qn = connection.ops.quote_name
+        table = qn(Job._meta.db_table)
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        counts = {}
+        with transaction.atomic(), connection.cursor() as cursor:
+            for field in FIELDS:
+                col = qn(Job._meta.get_field(field).column)
+                where = BROKEN_SQL[connection.vendor].format(col=col)
+                if dry_run:
+                    cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE {where}")
+                    counts[field] = cursor.fetchone()[0]
+                else:
+                    cursor.execute(
+                        f"UPDATE {table} SET {col} = '[]', {qn('updated_at')} = %s WHERE {where}", [now]
+                    )
+                    counts[field] = cursor.rowcount
+        return counts
 
-            if not isinstance(job.contract_types, list):
-                job.contract_types = []
-                changed = True
+    def fix_streaming(self, dry_run, chunk_size):
+        """Odczyt paczkami przez .iterator(); pamięć stała, UPDATE po id dla każdej pełnej paczki."""
+        counts = dict.fromkeys(FIELDS, 0)
+        pending = {field: [] for field in FIELDS}
 
-            if changed:
-                job.save(update_fields=['requirements', 'duties', 'benefits', 'contract_types'])
-                updated_count += 1
+        def flush(field):
+            if pending[field] and not dry_run:
+                Job.objects.filter(id__in=pending[field]).update(**{field: [], 'updated_at': timezone.now()})
+            pending[field] = []
 
-        self.stdout.write(self.style.SUCCESS(f"Zaktualizowano {updated_count} rekordów Job."))
+        rows = Job.objects.order_by().values_list('id', *FIELDS).iterator(chunk_size=chunk_size)
+        for pk, *values in rows:
+            for field, value in zip(FIELDS, values):
+                if not isinstance(value, list):
+                    counts[field] += 1
+                    pending[field].append(pk)
+                    if len(pending[field]) >= chunk_size:
+                        flush(field)
+        for field in FIELDS:
+            flush(field)
+        return counts
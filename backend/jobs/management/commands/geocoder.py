@@ -0,0 +1,189 @@
+"""
+Geokodowanie adresów ofert z trwałym cache w bazie (GeocodeCache).
+
+Klucz cache to znormalizowany adres. Trafienia są ważne GEOCODE_TTL_DAYS, a
+zapamiętane braki wyników (negative cache) GEOCODE_NEGATIVE_TTL_DAYS. Błędy sieci
+nie są zapamiętywane. Gdy adres nie daje wyniku, geokoder schodzi poziom niżej:
+adres -> miasto (najpierw środek miasta z cities.json) -> województwo.
+
+Przed bazą jest pamięć procesu (LRU na MEMO_SIZE wpisów, z tymi samymi TTL), a
+geocode_many geokoduje paczkę ofert, pytając o każdy adres najwyżej raz.
+Zapytania do backendu (domyślnie Nominatim) są ograniczane do jednego na
+`min_interval` sekund dla całego procesu. Ustawienie JOBS_GEOCODER = 'offline'
+wyłącza sieć: działa wtedy tylko cache i gazetteer.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+from jobs.gazetteer import gazetteer
+from jobs.models import GeocodeCache
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+MEMO_SIZE = 10000
+
+def normalize_address(address):
+    """'  ACME ,Warszawa,  Mazowieckie ' -> 'acme, warszawa, mazowieckie'"""
+    parts = [' '.join(p.split()) for p in (address or '').lower().split(',')]
+    return ', '.join(p for p in parts if p)[:255]
+
+class NominatimBackend:
+    def __init__(self, session=None, timeout=10):
+        self.session = session or requests.Session()
+        self.session.headers.setdefault('User-Agent', 'JobScraper/1.0')
+        self.timeout = timeout
+
+    def __call__(self, query):
+        """(lat, lon) albo None, gdy brak wyników; wyjątek requests przy błędzie sieci."""
+        resp = self.session.get(
+            NOMINATIM_URL,
+            params={"q": query, "format": "json", "limit": 1, "countrycodes": "pl"},
+            timeout=self.timeout,
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        if data:
+            return float(data[0]['lat']), float(data[0]['lon'])
+        return None
+
+class Geocoder:
+    def __init__(self, backend=None, min_interval=1.0, ttl_days=None, negative_ttl_days=None, memo_size=MEMO_SIZE):
+        self.backend = backend
+        self.min_interval = min_interval
+        self.ttl = timedelta(days=ttl_days or getattr(settings, 'GEOCODE_TTL_DAYS', 90))
+        self.negative_ttl = timedelta(days=negative_ttl_days or getattr(settings, 'GEOCODE_NEGATIVE_TTL_DAYS', 7))
+        self.memo_size = memo_size
+        self._memo = OrderedDict()  # klucz -> (wynik, ważny_do)
+        self._memo_lock = threading.Lock()
+        self._rate_lock = threading.Lock()
+        self._last_call = 0.0
+        self.stats = {'memo': 0, 'cache': 0, 'gazetteer': 0, 'network': 0, 'miss': 0}
+
+    # --- cache ---
+    def _expires(self, result, since):
+        return since + (self.ttl if result else self.negative_ttl)
+
+    def _remember(self, key, result, expires):
+        with self._memo_lock:
+            self._memo[key] = (result, expires)
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+
+    def _cached(self, key):
+        """(trafione, wynik): wynik to (lat, lon) albo None dla świeżego negatywnego wpisu."""
+        with self._memo_lock:
+            entry = self._memo.get(key)
+            if entry is not None:
+                if entry[1] > timezone.now():
+                    self._memo.move_to_end(key)
+                    self.stats['memo'] += 1
+                    return True, entry[0]
+                del self._memo[key]
+        try:
+            row = GeocodeCache.objects.filter(query=key).first()
+        except DatabaseError:
+            return False, None
+        if row is None:
+            return False, None
+        positive = row.latitude is not None and row.longitude is not None
+        result = (row.latitude, row.longitude) if positive else None
+        expires = self._expires(result, row.updated_at)
+        if expires <= timezone.now():
+            return False, None
+        self.stats['cache'] += 1
+        self._remember(key, result, expires)
+        return True, result
+
+    def _store(self, key, result, source):
+        self._remember(key, result, self._expires(result, timezone.now()))
+        lat, lon = result if result else (None, None)
+        try:
+            GeocodeCache.objects.update_or_create(
+                query=key, defaults={'latitude': lat, 'longitude': lon, 'source': source}
+            )
+        except DatabaseError:
+            pass
+
+    # --- sieć ---
+    def _remote(self, query):
+        """(lat, lon), None (brak wyników) albo wyjątek przy błędzie sieci."""
+        with self._rate_lock:
+            wait = self._last_call + self.min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                return self.backend(query)
+            finally:
+                self._last_call = time.monotonic()
+
+    def _lookup(self, query):
+        key = normalize_address(query)
+        if not key:
+            return None
+        hit, result = self._cached(key)
+        if hit:
+            return result
+        if self.backend is None:
+            return None
+        try:
+            result = self._remote(query)
+        except Exception as e:
+            print(f"❌ Geocode error dla: {query} :: {e}")
+            return None
+        self.stats['network'] += 1
+        self._store(key, result, 'nominatim')
+        return result
+
+    def geocode(self, address, city='', region=''):
+        """(lat, lon) najdokładniejszego dostępnego poziomu albo (None, None)."""
+        if address:
+            result = self._lookup(address)
+            if result:
+                return result
+        if city:
+            c = gazetteer.lookup(city)
+            if c:
+                self.stats['gazetteer'] += 1
+                return float(c['lat']), float(c['lon'])
+            result = self._lookup(', '.join(b for b in [city, region] if b))
+            if result:
+                return result
+        if region:
+            result = self._lookup(f'województwo {region}')
+            if result:
+                return result
+        self.stats['miss'] += 1
+        return None, None
+
+    def geocode_many(self, items):
+        """
+        Geokoduje wiele (address, city, region) naraz; każdy znormalizowany adres
+        trafia do backendu najwyżej raz. Zwraca słownik {krotka wejściowa: (lat, lon)}.
+        """
+        results = {}
+        by_key = {}
+        for item in items:
+            address, city, region = item
+            key = (normalize_address(address), normalize_address(city), normalize_address(region))
+            if key not in by_key:
+                by_key[key] = self.geocode(address, city, region)
+            results[item] = by_key[key]
+        return results
+
+_default = None
+_default_lock = threading.Lock()
+
+def default_geocoder():
+    """Współdzielony w procesie geokoder (wspólny limit zapytań dla wszystkich wątków)."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            offline = getattr(settings, 'JOBS_GEOCODER', 'nominatim') == 'offline'
+            _default = Geocoder(backend=None if offline else NominatimBackend())
+        return _default
@@ -1,28 +1,140 @@
-from django.core.management.base import BaseCommand
-from jobs.models import Job
-from .scraper import scrape_job
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from jobs.models import Job, derive_location
+from .driver_pool import DriverPool
+from .fetcher import TieredFetcher
+
+VALIDATOR_FIELDS = ('content_hash', 'http_etag', 'http_last_modified')
+
+def load_validators(urls):
+    """{source_url: {http_etag, http_last_modified, content_hash}} dla ofert już zapisanych."""
+    rows = Job.objects.filter(source_url__in=list(urls)).values('source_url', *VALIDATOR_FIELDS)
+    return {r.pop('source_url'): r for r in rows}
+
+def save_job(data, url):
+    """
+    Zapisuje wynik scrapowania i zwraca (job, created, zmienione_pola).
+    Istniejąca oferta dostaje UPDATE tylko zmienionych kolumn; updated_at rusza się
+    tylko przy zmianie treści, a zmiana miasta albo województwa przelicza location.
+    Wynik 'not_modified' aktualizuje jedynie walidatory.
+    """
+    url = data.get('source_url', url)
+    now = timezone.now()
+    if data.get('not_modified'):
+        fresh = {f: data[f] for f in VALIDATOR_FIELDS if f in data}
+        Job.objects.filter(source_url=url).update(checked_at=now, **fresh)
+        return None, False, []
+
+    job = Job.objects.filter(source_url=url).first()
+    if job is None:
+        return Job.objects.create(**dict(data, source_url=url, checked_at=now)), True, list(data)
+
+    changed = [f for f, v in data.items() if getattr(job, f) != v]
+    for f in changed:
+        setattr(job, f, data[f])
+    if 'location' not in data and {'city', 'region'} & set(changed):
+        location = derive_location(job.city, job.region)
+        if location != job.location:
+            job.location = location
+            changed.append('location')
+    content = [f for f in changed if f not in VALIDATOR_FIELDS]
+    job.checked_at = now
+    job.save(update_fields=changed + ['checked_at'] + (['updated_at'] if content else []))
+    return job, False, content
 
 class Command(BaseCommand):
-    help = "Scrapuje pojedynczą ofertę i zapisuje do bazy. Użycie: --url <link>"
+    help = ("Scrapuje oferty i zapisuje do bazy. Użycie: --url <link> albo "
+            "--urls-file <plik|-> [--workers 4] [--recycle-after 50]")
 
     def add_arguments(self, parser):
-        parser.add_argument('--url', type=str, required=True, help='URL oferty')
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--url', type=str, help='URL oferty')
+        target.add_argument('--urls-file', type=str, help="Plik z URL-ami (jeden na linię), '-' = stdin")
         parser.add_argument('--source', type=str, default='pracuj.pl', help='Nazwa źródła (opcjonalnie)')
+        parser.add_argument('--workers', type=int, default=4, help='Liczba równoległych przeglądarek (tryb wsadowy)')
+        parser.add_argument('--recycle-after', type=int, default=50,
+                            help='Po ilu stronach wymienić przeglądarkę (tryb wsadowy)')
+        parser.add_argument('--browser-only', action='store_true',
+                            help='Pomiń pobieranie przez HTTP i zawsze renderuj stronę w Selenium')
 
     def handle(self, *args, **options):
+        if options['urls_file']:
+            return self.handle_batch(options)
+
         url = options['url']
         source = options['source']
 
-        data = scrape_job(url, source_name=source)
+        fetcher = TieredFetcher(source_name=source, http_first=not options['browser_only'])
+        try:
+            data = fetcher.fetch(url, load_validators([url]).get(url))
+        finally:
+            fetcher.close()
         if not data:
-            self.stdout.write(self.style.ERROR("Scraper nie zwrócił danych. Sprawdź debug_offer.html."))
+            self.stdout.write(self.style.ERROR("Scraper nie zwrócił danych. Włącz JOBS_CAPTURE_DIR, żeby zachować HTML nieudanych stron."))
             return
 
-        job, created = Job.objects.update_or_create(
-            source_url=data.get('source_url', url),
-            defaults=data
-        )
+        job, created, changed = save_job(data, url)
         if created:
             self.stdout.write(self.style.SUCCESS(f"Dodano ofertę: {job.title or '(bez tytułu)'}"))
+        elif changed:
+            self.stdout.write(self.style.WARNING(
+                f"Zaktualizowano ofertę: {job.title or '(bez tytułu)'} ({', '.join(changed)})"
+            ))
         else:
-            self.stdout.write(self.style.WARNING(f"Zaktualizowano ofertę: {job.title or '(bez tytułu)'}"))
+            self.stdout.write(f"Bez zmian: {url}")
+
+    def read_urls(self, path):
+        if path == '-':
+            return [line for line in sys.stdin if line.strip() and not line.startswith('#')]
+        try:
+            with open(path, encoding='utf-8') as f:
+                return [line for line in f if line.strip() and not line.startswith('#')]
+        except OSError as e:
+            raise CommandError(f"Nie można odczytać {path}: {e}")
+
+    def handle_batch(self, options):
+        urls = self.read_urls(options['urls_file'])
+        pool = DriverPool(
+            workers=options['workers'],
+            recycle_after=options['recycle_after'],
+            source_name=options['source'],
+            http_first=not options['browser_only'],
+        )
+        created = updated = unchanged = failed = 0
+        t0 = time.perf_counter()
+        validators = load_validators(u.strip() for u in urls)
+        for url, data in pool.run(urls, validators):
+            if not data:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f"Brak danych: {url}"))
+                continue
+            job, was_created, changed = save_job(data, url)
+            if was_created:
+                created += 1
+            elif changed:
+                updated += 1
+            else:
+                unchanged += 1
+        elapsed = time.perf_counter() - t0
+
+        for s in pool.stats:
+            if s.pages:
+                self.stdout.write(
+                    f"{s.name}: {s.pages} stron, {s.errors} błędów, {s.drivers_started} uruchomień Chrome, "
+                    f"{s.pages_per_minute:.1f} stron/min, tiery: {dict(s.tiers)}"
+                )
+        tiers = {}
+        for _, tier, seconds in pool.log:
+            count, total_s = tiers.get(tier, (0, 0.0))
+            tiers[tier] = (count + 1, total_s + seconds)
+        for tier, (count, total_s) in sorted(tiers.items()):
+            self.stdout.write(f"tier {tier}: {count} URL-i, śr. {total_s / count:.2f} s/URL")
+        total = created + updated + unchanged + failed
+        rate = 60.0 * total / elapsed if elapsed else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f"Dodano {created}, zaktualizowano {updated}, bez zmian {unchanged}, nieudanych {failed} "
+            f"w {elapsed:.1f} s ({rate:.1f} ofert/min)."
+        ))
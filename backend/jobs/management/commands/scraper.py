@@ -1,23 +1,103 @@
+import hashlib
+import json
 import re
 import traceback
 from datetime import datetime
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, NavigableString, Tag
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import requests
+
+from .capture import capture_page
+from .geocoder import default_geocoder
 
 PL_CURRENCY = 'PLN'
 
+# ---------------- Wzorce (kompilowane raz, przy imporcie modułu) ---------------- #
+
+CITIES = ('Szczecin', 'Warszawa', 'Gdańsk', 'Poznań', 'Wrocław', 'Kraków', 'Łódź', 'Katowice',
+          'Białystok', 'Rzeszów', 'Lublin', 'Gdynia', 'Sopot')
+REGIONS = ('dolnośląskie', 'kujawsko-pomorskie', 'lubelskie', 'lubuskie', 'łódzkie', 'małopolskie',
+           'mazowieckie', 'opolskie', 'podkarpackie', 'podlaskie', 'pomorskie', 'śląskie',
+           'świętokrzyskie', 'warmińsko-mazurskie', 'wielkopolskie', 'zachodniopomorskie')
+CONTRACT_TYPES = ('umowa o pracę', 'umowa zlecenie', 'umowa o dzieło', 'B2B')
+REMOTE_KEYWORDS = ('praca zdalna', 'zdalna', 'remote')
+FULL_TIME = 'pełny etat'
+GENERIC_COMPANY_NAMES = ('o firmie', 'informacje o firmie')
+MONTHS = {
+    'stycznia': 1, 'lutego': 2, 'marca': 3, 'kwietnia': 4, 'maja': 5, 'czerwca': 6,
+    'lipca': 7, 'sierpnia': 8, 'września': 9, 'października': 10, 'listopada': 11, 'grudnia': 12,
+}
+
+NUMBER_RE = re.compile(r'(\d+(?:\.\d+)*)')
+CITY_RE = re.compile(r'\b(' + '|'.join(CITIES) + r')\b', re.I)
+REGION_RE = re.compile('(' + '|'.join(REGIONS) + ')', re.I)
+SALARY_RE = re.compile(r'([\d\s.,]+-\s*[\d\s.,]+\s*zł.*?(brutto|netto)?|[\d\s.,]+\s*zł.*?(brutto|netto)?)', re.I)
+ZL_RE = re.compile(r'\bzł\b')
+GROSS_NET_RE = re.compile(r'brutto|netto', re.I)
+DATE_LABEL_RE = re.compile(r'Opublikowano|Dodano|Published', re.I)
+POLISH_DATE_RE = re.compile(r'(\d{1,2})\s+([a-ząćęłńóśźż]+)\s+(\d{4})')
+# Jedna alternacja dla wszystkich słów kluczowych szukanych w tekście oferty (małymi literami);
+# dłuższe warianty pierwsze, żeby 'kontrakt b2b' nie rozpadło się na 'b2b'.
+KEYWORDS = {key.lower(): key for key in CONTRACT_TYPES}
+KEYWORDS['kontrakt b2b'] = 'B2B'
+KEYWORDS.update({key: 'remote' for key in REMOTE_KEYWORDS})
+KEYWORDS[FULL_TIME] = FULL_TIME
+KEYWORD_RE = re.compile('|'.join(re.escape(k) for k in sorted(KEYWORDS, key=len, reverse=True)))
+
 # ---------------- Funkcje pomocnicze ---------------- #
 
+def flatten_text(node):
+    """Tekst węzła ze znormalizowanymi białymi znakami - liczony raz i przekazywany dalej."""
+    return ' '.join(node.get_text(' ', strip=True).split())
+
+def _stray_content(parent, allowed):
+    """Czy `parent` ma poza `allowed` inne tagi albo niepusty tekst (komentarze i doctype się nie liczą)."""
+    return any(
+        all(child is not a for a in allowed) if isinstance(child, Tag) else type(child) is NavigableString and child.strip()
+        for child in parent.children
+    )
+
+def page_texts(soup):
+    """
+    (tekst całej strony, tekst <body> albo None) ze spłaszczaniem <body> tylko raz. lxml
+    układa dokument w <head> i <body>, więc tekst strony to zwykle tekst <head> i <body>
+    po kolei; dla nietypowego drzewa oba teksty liczone są osobno.
+    """
+    html, head, body = soup.html, soup.head, soup.body
+    if body is None:
+        return flatten_text(soup), None
+    body_text = flatten_text(body)
+    if html is None or _stray_content(soup, [html]) or _stray_content(html, [head, body]):
+        return flatten_text(soup), body_text
+    head_text = flatten_text(head) if head is not None else ''
+    return ' '.join(t for t in (head_text, body_text) if t), body_text
+
+def page_content_hash(soup, full_text=None):
+    """
+    Skrót treści strony do wykrywania zmian: sha256 spłaszczonego tekstu i bloków JSON-LD.
+    Liczony z drzewa, a nie z bajtów odpowiedzi, więc ta sama oferta z surowego HTML
+    (tier HTTP) i z DOM przeglądarki daje ten sam skrót.
+    """
+    if full_text is None:
+        full_text = page_texts(soup)[0]
+    digest = hashlib.sha256(full_text.encode('utf-8'))
+    # JSON-LD nie wchodzi do get_text(), a bywa jedynym źródłem np. wynagrodzenia
+    for script in soup.find_all('script', type='application/ld+json'):
+        digest.update(b'\0' + ' '.join((script.string or script.get_text() or '').split()).encode('utf-8'))
+    return digest.hexdigest()
+
+def find_keywords(text):
+    """Jedno przejście KEYWORD_RE po tekście -> zbiór znalezionych etykiet (typy umów, 'remote', 'pełny etat')."""
+    return {KEYWORDS[m.group(0)] for m in KEYWORD_RE.finditer(text.lower())}
+
 def parse_salary(text):
     if not text:
         return None, None, PL_CURRENCY
     t = text.replace('\u00a0', ' ').replace(',', '.')
-    nums = re.findall(r'(\d+(?:\.\d+)*)', t)
+    nums = NUMBER_RE.findall(t)
     vals = []
     for n in nums:
         try:
@@ -36,73 +116,53 @@ def parse_salary(text):
 def clean_list(soup_list):
     return [' '.join(li.get_text(' ', strip=True).split()) for li in soup_list if li.get_text(strip=True)]
 
-def extract_address_and_location(block):
+def extract_address_and_location(block, text=None):
     address = ''
     city = ''
     region = ''
 
     addr_tag = block.find('address')
     if addr_tag:
-        address = ' '.join(addr_tag.get_text(' ', strip=True).split())
+        address = flatten_text(addr_tag)
 
-    text = ' '.join(block.get_text(' ', strip=True).split())
-    city_match = re.search(
-        r'\b(Szczecin|Warszawa|Gdańsk|Poznań|Wrocław|Kraków|Łódź|Katowice|Białystok|Rzeszów|Lublin|Gdynia|Sopot)\b',
-        text, re.I
-    )
+    if text is None:
+        text = flatten_text(block)
+    city_match = CITY_RE.search(text)
     if city_match:
         city = city_match.group(0).capitalize()
 
-    region_match = re.search(
-        r'(dolnośląskie|kujawsko-pomorskie|lubelskie|lubuskie|łódzkie|małopolskie|mazowieckie|opolskie|podkarpackie|podlaskie|pomorskie|śląskie|świętokrzyskie|warmińsko-mazurskie|wielkopolskie|zachodniopomorskie)',
-        text, re.I
-    )
+    region_match = REGION_RE.search(text)
     if region_match:
         r = region_match.group(0).lower()
         region = r[0].upper() + r[1:]
     return address, city, region
 
-def extract_contracts(text):
-    types = []
-    for key in ['umowa o pracę', 'umowa zlecenie', 'umowa o dzieło', 'B2B', 'kontrakt B2B']:
-        if key.lower() in text.lower():
-            types.append('B2B' if key.lower() == 'kontrakt b2b' else key)
-    return list(dict.fromkeys(types))
+def extract_contracts(text, keywords=None):
+    if keywords is None:
+        keywords = find_keywords(text)
+    return [key for key in CONTRACT_TYPES if key in keywords]
 
 def parse_posted_at(text):
-    months = {
-        'stycznia':1, 'lutego':2, 'marca':3, 'kwietnia':4, 'maja':5, 'czerwca':6,
-        'lipca':7, 'sierpnia':8, 'września':9, 'października':10, 'listopada':11, 'grudnia':12
-    }
-    m = re.search(r'(\d{1,2})\s+([a-ząćęłńóśźż]+)\s+(\d{4})', text.lower())
+    m = POLISH_DATE_RE.search(text.lower())
     if m:
-        d, mon, y = int(m.group(1)), months.get(m.group(2), 1), int(m.group(3))
-        return datetime(y, mon, d).date()
+        d, mon, y = int(m.group(1)), MONTHS.get(m.group(2), 1), int(m.group(3))
+        try:
+            return datetime(y, mon, d).date()
+        except ValueError:  # np. "31 lutego"
+            return None
     try:
         return datetime.fromisoformat(text).date()
     except:
         return None
 
-def geocode_address(address):
-    try:
-        if not address or not address.strip():
-            return None, None
-        resp = requests.get(
-            "https://nominatim.openstreetmap.org/search",
-            params={"q": address, "format": "json", "limit": 1},
-            headers={"User-Agent": "JobScraper/1.0"},
-            timeout=10
-        )
-        data = resp.json()
-        if data:
-            lat = float(data[0]['lat'])
-            lon = float(data[0]['lon'])
-            print(f"🗺️ Geocoded: {address} -> {lat}, {lon}")
-            return lat, lon
-        print(f"⚠️ Geocode brak wyników dla: {address}")
-    except Exception as e:
-        print(f"❌ Geocode error dla: {address} :: {e}")
-    return None, None
+def geocode_address(address, city='', region=''):
+    """(lat, lon) z cache / Nominatim, z zejściem do miasta i województwa; patrz geocoder.py."""
+    lat, lon = default_geocoder().geocode(address, city, region)
+    if lat is not None:
+        print(f"🗺️ Geocoded: {address or city or region} -> {lat}, {lon}")
+    else:
+        print(f"⚠️ Geocode brak wyników dla: {address or city or region}")
+    return lat, lon
 
 def extract_company(soup):
     """
@@ -124,35 +184,252 @@ def extract_company(soup):
         el = soup.select_one(sel)
         if el:
             txt = el.get_text(strip=True)
-            if txt and txt.lower() not in ['o firmie', 'informacje o firmie']:
+            if txt and txt.lower() not in GENERIC_COMPANY_NAMES:
                 return txt
     return ''
 
-def extract_salary_text(soup):
-    text = soup.get_text(' ', strip=True)
-    m = re.search(r'([\d\s.,]+-\s*[\d\s.,]+\s*zł.*?(brutto|netto)?|[\d\s.,]+\s*zł.*?(brutto|netto)?)', text, re.I)
+def extract_salary_text(soup, text=None):
+    if text is None:
+        text = flatten_text(soup)
+    m = SALARY_RE.search(text)
     if m:
         return m.group(0).strip()
-    el = soup.find(string=re.compile(r'\bzł\b')) or soup.find(string=re.compile(r'brutto|netto', re.I))
+    el = soup.find(string=ZL_RE) or soup.find(string=GROSS_NET_RE)
     if isinstance(el, str):
         return el.strip()
     if el:
         return el.get_text(' ', strip=True)
     return ''
 
+def extract_json_ld_job(soup):
+    """Pierwszy obiekt schema.org JobPosting z <script type="application/ld+json"> albo None."""
+    for script in soup.find_all('script', type='application/ld+json'):
+        try:
+            data = json.loads(script.string or script.get_text() or '')
+        except ValueError:
+            continue
+        stack = [data]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, list):
+                stack.extend(node)
+            elif isinstance(node, dict):
+                types = node.get('@type')
+                if types == 'JobPosting' or (isinstance(types, list) and 'JobPosting' in types):
+                    return node
+                if '@graph' in node:
+                    stack.append(node['@graph'])
+    return None
+
+def _first(value):
+    return value[0] if isinstance(value, list) and value else value
+
+def job_posting_fields(posting):
+    """Pola oferty z JobPosting w nazewnictwie modelu Job (tylko te, które udało się odczytać)."""
+    if not isinstance(posting, dict):
+        return {}
+    out = {}
+    if posting.get('title'):
+        out['title'] = ' '.join(str(posting['title']).split())
+    org = _first(posting.get('hiringOrganization'))
+    if isinstance(org, dict) and org.get('name'):
+        out['company'] = str(org['name']).strip()
+    elif isinstance(org, str):
+        out['company'] = org.strip()
+    place = _first(posting.get('jobLocation'))
+    addr = place.get('address') if isinstance(place, dict) else None
+    if isinstance(addr, dict):
+        out['address'] = str(addr.get('streetAddress') or '').strip()
+        out['city'] = str(addr.get('addressLocality') or '').strip()
+        region = str(addr.get('addressRegion') or '').strip()
+        out['region'] = region[:1].upper() + region[1:]
+    if posting.get('jobLocationType') == 'TELECOMMUTE':
+        out['is_remote'] = True
+    salary = _first(posting.get('baseSalary'))
+    if isinstance(salary, dict):
+        value = salary.get('value')
+        try:
+            if isinstance(value, dict):
+                lo = value.get('minValue', value.get('value'))
+                hi = value.get('maxValue', lo)
+            else:
+                lo = hi = value
+            if lo is not None:
+                out['salary_min'] = int(float(lo))
+                out['salary_max'] = int(float(hi if hi is not None else lo))
+        except (TypeError, ValueError):
+            pass
+        if salary.get('currency'):
+            out['currency'] = str(salary['currency'])
+    if posting.get('datePosted'):
+        out['posted_at'] = str(posting['datePosted'])[:10]
+    if posting.get('description'):
+        text = BeautifulSoup(str(posting['description']), 'html.parser').get_text(' ', strip=True)
+        out['description'] = ' '.join(text.split())
+    return out
+
 # ---------------- Główna funkcja scrapera ---------------- #
 
-def scrape_job(url, source_name='pracuj.pl'):
-    driver = None
+def extract_fields(soup, texts=None):
+    """
+    Pola oferty odczytane z samego HTML, w jednym przebiegu: tekst strony jest spłaszczany
+    raz, a miasta, województwa, typy umów, praca zdalna i etat wyszukiwane prekompilowanymi
+    wzorcami. Bez JSON-LD, geokodowania i efektów ubocznych (używane też w bench_extraction).
+    texts: gotowy wynik page_texts(soup), jeśli wywołujący już go policzył.
+    """
+    full_text, body_text = texts or page_texts(soup)
+    keywords = find_keywords(full_text)
+
+    title_el = soup.select_one('h1, h1.job-title, .job-title')
+
+    details_block = soup.select_one('.job-details, .details, .offer-details, .job-offer, main, body') or soup
+    if details_block is soup:
+        block_text = full_text
+    elif details_block is soup.body:
+        block_text = body_text
+    else:
+        block_text = flatten_text(details_block)
+    address, city, region = extract_address_and_location(details_block, block_text)
+
+    salary_text = extract_salary_text(soup, full_text)
+    s_min, s_max, currency = parse_salary(salary_text) if salary_text else (None, None, PL_CURRENCY)
+
+    date_node = soup.find(string=DATE_LABEL_RE) or soup.find('time')
+    posted_at = None
+    if date_node:
+        txt = date_node if isinstance(date_node, str) else date_node.get_text(' ', strip=True)
+        posted_at = parse_posted_at(txt)
+
+    return dict(
+        title=title_el.get_text(strip=True) if title_el else '',
+        company=extract_company(soup),
+        address=address,
+        city=city,
+        region=region,
+        is_remote='remote' in keywords,
+        salary_text=salary_text,
+        salary_min=s_min,
+        salary_max=s_max,
+        currency=currency,
+        contract_types=extract_contracts(full_text, keywords),
+        work_time=FULL_TIME if FULL_TIME in keywords else '',
+        posted_at=posted_at,
+        duties=clean_list(soup.select('[data-test="section-responsibilities"] li')),
+        requirements=clean_list(soup.select('[data-test="section-requirements"] li')),
+        benefits=clean_list(soup.select('[data-test="section-benefits"] li')),
+        description=' '.join(
+            p.get_text(' ', strip=True)
+            for p in soup.select('article p, .description p, .job-description p')[:12]
+        ).strip(),
+    )
+
+def parse_offer(soup, url, source_name='pracuj.pl', texts=None, geocode=True):
+    """
+    Wyciąga dane oferty z gotowego drzewa HTML (niezależnie od tego, czym pobrano stronę).
+    geocode=False zostawia współrzędne puste - TieredFetcher geokoduje dopiero wynik
+    tieru, który wygrał (geocode_offer), żeby nie płacić za niepełne strony z HTTP.
+    """
+    fields = extract_fields(soup, texts)
+    # Dane strukturalne JSON-LD (schema.org/JobPosting) uzupełniają to, czego nie ma w HTML
+    ld = job_posting_fields(extract_json_ld_job(soup))
+
+    title_text = fields['title'] or ld.get('title', '')
+    company_text = fields['company'] or ld.get('company', '')
+    if not company_text:
+        print(f"⚠️ Nie znaleziono nazwy firmy dla: {url}")
+
+    # Lokalizacja
+    address = fields['address'] or ld.get('address', '')
+    city = fields['city'] or ld.get('city', '')
+    region = fields['region'] or ld.get('region', '')
+    remote = ld.get('is_remote') or fields['is_remote']
+
+    # Wynagrodzenie
+    salary_text = fields['salary_text']
+    s_min, s_max, currency = fields['salary_min'], fields['salary_max'], fields['currency']
+    if s_min is None and ld.get('salary_min') is not None:
+        s_min, s_max = ld['salary_min'], ld.get('salary_max', ld['salary_min'])
+        currency = ld.get('currency') or currency
+
+    # Data publikacji
+    posted_at = fields['posted_at']
+    if posted_at is None and ld.get('posted_at'):
+        posted_at = parse_posted_at(ld['posted_at'])
+
+    # Opis (krótki) + fallback
+    description = fields['description'] or ld.get('description', '')
+
+    if not description:
+        parts = []
+        if company_text:
+            parts.append(f"Oferta w firmie {company_text}")
+        if title_text:
+            parts.append(f"na stanowisku {title_text}")
+        loc_str = ', '.join([b for b in [city, region] if b])
+        if loc_str:
+            parts.append(f"({loc_str})")
+        description = (' '.join(parts) + '.') if parts else "Oferta pracy. Szczegóły nie zostały podane w oryginalnej treści."
+
+    # Zwracamy dane
+    data = dict(
+        source_name=source_name,
+        source_url=url,
+        title=title_text,
+        company=company_text,
+        address=address,
+        city=city,
+        region=region,
+        location=', '.join([b for b in [city, region] if b]),
+        latitude=None,
+        longitude=None,
+        is_remote=remote,
+        salary_text=salary_text,
+        salary_min=s_min,
+        salary_max=s_max,
+        currency=currency or PL_CURRENCY,
+        contract_types=fields['contract_types'],
+        work_time=fields['work_time'],
+        posted_at=posted_at,
+        duties=fields['duties'],
+        requirements=fields['requirements'],
+        benefits=fields['benefits'],
+        description=description,
+    )
+    return geocode_offer(data) if geocode else data
+
+def geocode_offer(data):
+    """Uzupełnia latitude/longitude oferty; nazwa firmy wchodzi do adresu tylko, gdy nie jest generyczna."""
+    company = data.get('company', '')
+    parts = [data.get('address', ''), data.get('city', ''), data.get('region', '')]
+    if company and company.lower() not in GENERIC_COMPANY_NAMES:
+        parts.insert(0, company)
+    full_address = ', '.join([a for a in parts if a])
+    if full_address:
+        data['latitude'], data['longitude'] = geocode_address(full_address, data.get('city', ''), data.get('region', ''))
+    return data
+
+
+def make_driver():
+    """Nowa instancja headless Chrome (kosztowna - kilka sekund startu)."""
+    chrome_options = Options()
+    chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    return webdriver.Chrome(options=chrome_options)
+
+def scrape_job(url, source_name='pracuj.pl', driver=None, geocode=True):
+    """
+    Scrapuje jedną ofertę. Z przekazanym `driver` (np. z DriverPool) używa go
+    ponownie i nie zamyka; bez niego uruchamia i zamyka własną przeglądarkę.
+    geocode=False: bez współrzędnych (patrz parse_offer).
+    """
+    own_driver = driver is None
+    html = ''
     try:
-        chrome_options = Options()
-        chrome_options.add_argument("--headless=new")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-
-        driver = webdriver.Chrome(options=chrome_options)
+        if own_driver:
+            driver = make_driver()
         driver.get(url)
 
         WebDriverWait(driver, 15).until(
@@ -160,103 +437,28 @@ def scrape_job(url, source_name='pracuj.pl'):
         )
 
         html = driver.page_source
-        soup = BeautifulSoup(html, 'html.parser')
-
-        # Zapis HTML do debugowania
-        with open("debug_offer.html", "w", encoding="utf-8") as f:
-            f.write(soup.prettify())
-
-        # Tytuł
-        title_el = soup.select_one('h1, h1.job-title, .job-title')
-        title_text = title_el.get_text(strip=True) if title_el else ''
-
-        # Firma
-        company_text = extract_company(soup)
-        if not company_text:
-            print(f"⚠️ Nie znaleziono nazwy firmy dla: {url}")
-
-        # Lokalizacja
-        details_block = soup.select_one('.job-details, .details, .offer-details, .job-offer, main, body') or soup
-        address, city, region = extract_address_and_location(details_block)
-        remote = any(s in soup.get_text(' ', strip=True).lower() for s in ['praca zdalna', 'zdalna', 'remote'])
-
-        # Wynagrodzenie
-        salary_text = extract_salary_text(soup)
-        s_min, s_max, currency = parse_salary(salary_text) if salary_text else (None, None, PL_CURRENCY)
-
-        # Typ umowy, czas pracy
-        full_text = soup.get_text(' ', strip=True)
-        contract_types = extract_contracts(full_text)
-        work_time = 'pełny etat' if 'pełny etat' in full_text.lower() else ''
-
-        # Sekcje listowe
-        duties = clean_list(soup.select('[data-test="section-responsibilities"] li'))
-        requirements = clean_list(soup.select('[data-test="section-requirements"] li'))
-        benefits = clean_list(soup.select('[data-test="section-benefits"] li'))
-
-                # Data publikacji
-        date_node = soup.find(string=re.compile(r'Opublikowano|Dodano|Published', re.I)) or soup.find('time')
-        posted_at = None
-        if date_node:
-            txt = date_node if isinstance(date_node, str) else date_node.get_text(' ', strip=True)
-            posted_at = parse_posted_at(txt)
-
-        # Opis (krótki) + fallback
-        description = ' '.join(
-            p.get_text(' ', strip=True)
-            for p in soup.select('article p, .description p, .job-description p')[:12]
-        ).strip()
-
-        if not description:
-            parts = []
-            if company_text:
-                parts.append(f"Oferta w firmie {company_text}")
-            if title_text:
-                parts.append(f"na stanowisku {title_text}")
-            loc_str = ', '.join([b for b in [city, region] if b])
-            if loc_str:
-                parts.append(f"({loc_str})")
-            description = (' '.join(parts) + '.') if parts else "Oferta pracy. Szczegóły nie zostały podane w oryginalnej treści."
-
-        # Geolokalizacja – użyj nazwy firmy tylko jeśli nie jest generyczna
-        full_address_parts = [address, city, region]
-        if company_text and company_text.lower() not in ['o firmie', 'informacje o firmie']:
-            full_address_parts.insert(0, company_text)
-        full_address = ', '.join([a for a in full_address_parts if a])
-        lat, lon = geocode_address(full_address) if full_address else (None, None)
-
-        # Zwracamy dane
-        return dict(
-            source_name=source_name,
-            source_url=url,
-            title=title_text,
-            company=company_text,
-            address=address,
-            city=city,
-            region=region,
-            location=', '.join([b for b in [city, region] if b]),
-            latitude=lat,
-            longitude=lon,
-            is_remote=remote,
-            salary_text=salary_text,
-            salary_min=s_min,
-            salary_max=s_max,
-            currency=currency or PL_CURRENCY,
-            contract_types=contract_types,
-            work_time=work_time,
-            posted_at=posted_at,
-            duties=duties,
-            requirements=requirements,
-            benefits=benefits,
-            description=description,
-        )
+        # ten sam parser co w tierze HTTP - drzewo, a więc i content_hash, wychodzą takie same
+        soup = BeautifulSoup(html, 'lxml')
+        texts = page_texts(soup)
+
+        data = parse_offer(soup, url, source_name, texts, geocode=geocode)
+        data['content_hash'] = page_content_hash(soup, texts[0])
+        # surowy HTML do magazynu (opcjonalnie, JOBS_CAPTURE_DIR): niepełne strony zawsze, reszta próbkowana
+        capture_page(url, html, ok=bool(data.get('title')))
+        return data
 
     except Exception as e:
         print("❌ Błąd scrapowania:", e)
         traceback.print_exc()
+        if not html and driver is not None:
+            try:
+                html = driver.page_source
+            except Exception:
+                pass
+        capture_page(url, html, ok=False)
         return {}
     finally:
-        if driver:
+        if own_driver and driver:
             try:
                 driver.quit()
             except Exception:
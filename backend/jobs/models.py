@@ -1,10 +1,21 @@
 from django.db import models
+from django.utils import timezone
+
+def derive_location(city, region):
+    """Domyślna lokalizacja oferty: 'miasto, województwo' (Job.save i bulk_ingest)."""
+    return ', '.join(b for b in [city, region] if b)
+
+def fold_city(city):
+    """Klucz miasta do ?city=: casefold w Pythonie, bo lower() w SQLite zmienia tylko ASCII."""
+    return (city or '').strip().casefold()
 
 class Job(models.Model):
     title = models.CharField(max_length=255, default='', blank=True)
     company = models.CharField(max_length=255, default='', blank=True)
     address = models.CharField(max_length=255, default='', blank=True)
     city = models.CharField(max_length=120, default='', blank=True)
+    # fold_city(city), utrzymywane przez Job.save i bulk_ingest; ?city= szuka po prefiksie
+    city_key = models.CharField(max_length=120, default='', blank=True, editable=False)
     region = models.CharField(max_length=120, default='', blank=True)
     location = models.CharField(max_length=255, default='', blank=True)
     latitude = models.FloatField(null=True, blank=True)
@@ -21,14 +32,84 @@ class Job(models.Model):
     requirements = models.JSONField(default=list, blank=True, null=True)
     benefits = models.JSONField(default=list, blank=True, null=True)
     description = models.TextField(default='', blank=True)
+    source_name = models.CharField(max_length=100, default='', blank=True)
+    # klucz upsertu (bulk_ingest); NULL dla ofert bez źródła, np. dodanych ręcznie w adminie
+    source_url = models.URLField(max_length=500, null=True, blank=True, unique=True)
+    # warunkowe odświeżanie: skrót treści strony i walidatory HTTP z ostatniego pobrania
+    content_hash = models.CharField(max_length=64, default='', blank=True)
+    http_etag = models.CharField(max_length=255, default='', blank=True)
+    http_last_modified = models.CharField(max_length=64, default='', blank=True)
+    checked_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # indeksy pod kształty zapytań JobViewSet; weryfikuje je `manage.py check_query_plans`
+        indexes = [
+            # domyślna lista (-created_at) i paginacja kursorem
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['-posted_at', '-id']),
+            # ?is_remote=true&ordering=-posted_at
+            models.Index(fields=['is_remote', '-posted_at']),
+            # ?city= (prefiks city_key); opclass tylko w PostgreSQL, pod LIKE 'x%'
+            models.Index(fields=['city_key'], name='jobs_job_city_key_idx', opclasses=['varchar_pattern_ops']),
+            # ?min_salary= / ?max_salary= i sortowanie po wynagrodzeniu
+            models.Index(fields=['salary_min']),
+            models.Index(fields=['salary_max']),
+            # /api/jobs/featured/
+            models.Index(fields=['-salary_max', '-posted_at', '-created_at']),
+            # prefiltr bounding-box dla wyszukiwania w promieniu (nearby, city+radius_km)
+            models.Index(fields=['latitude', 'longitude']),
+            # /api/jobs/changes/ (kursor po (updated_at, id)) i watermark max(updated_at)
+            models.Index(fields=['updated_at', 'id']),
+        ]
+
     def save(self, *args, **kwargs):
+        # pola wyliczane tutaj muszą trafić do UPDATE razem z polami, z których powstają
+        derived = set()
         if not self.location:
-            bits = [b for b in [self.city, self.region] if b]
-            self.location = ', '.join(bits)
+            self.location = derive_location(self.city, self.region)
+            derived.add('location')
+        self.city_key = fold_city(self.city)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            if 'city' in update_fields:
+                derived.add('city_key')
+            kwargs['update_fields'] = set(update_fields) | derived
         super().save(*args, **kwargs)
 
     def __str__(self):
         return f'{self.title} @ {self.company}'.strip()
+
+class JobTombstone(models.Model):
+    """Ślad usuniętej oferty dla /api/jobs/changes/; starsze niż JOBS_TOMBSTONE_DAYS są kasowane."""
+    job_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f'{self.job_id} usunięta {self.deleted_at:%Y-%m-%d %H:%M}'
+
+class JobFacetCount(models.Model):
+    """Liczby ofert per wartość faceta bez filtrów (/api/jobs/facets/); odświeża jobs.tasks.refresh_facets."""
+    facet = models.CharField(max_length=20)
+    value = models.CharField(max_length=255)
+    count = models.IntegerField()
+    refreshed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['facet', 'value'], name='jobs_facet_value_uniq')]
+        indexes = [models.Index(fields=['facet', '-count'])]
+
+    def __str__(self):
+        return f'{self.facet}={self.value}: {self.count}'
+
+class GeocodeCache(models.Model):
+    """Trwały cache geokodowania; latitude/longitude = NULL to zapamiętany brak wyniku."""
+    query = models.CharField(max_length=255, unique=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    source = models.CharField(max_length=20, default='', blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.query} -> {self.latitude}, {self.longitude}'
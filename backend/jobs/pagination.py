@@ -0,0 +1,164 @@
+"""
+Paginacja keyset (kursorowa) dla listy ofert.
+
+Kolejną stronę wyznacza para (wartość pola sortowania, id) ostatniej oferty
+z poprzedniej strony, więc głęboka strona kosztuje tyle co pierwsza: nie ma
+OFFSET ani COUNT(*). Puste wartości (np. brak salary_min) zawsze lądują na końcu.
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+class JobKeysetPagination(BasePagination):
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    default_ordering = '-created_at'
+    invalid_cursor_message = 'Nieprawidłowy kursor'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            size = 0
+        if size <= 0:
+            return getattr(settings, 'JOBS_PAGE_SIZE', 20)
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, request, queryset, view):
+        """Pierwsze pole z ?ordering= (o ile jest w ordering_fields widoku), inaczej
+        trafność wyszukiwania (search_rank), a bez wyszukiwania -created_at."""
+        for backend in getattr(view, 'filter_backends', []):
+            if issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+                if ordering:
+                    return ordering[0]
+        if 'search_rank' in queryset.query.annotations:
+            return 'search_rank'
+        return self.default_ordering
+
+    def get_field(self, queryset, name):
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        return queryset.model._meta.get_field(name)
+
+    def decode_cursor(self, request, field):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            return (None if value is None else field.to_python(value)), int(pk)
+        except (TypeError, ValueError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, value, pk):
+        if isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        raw = json.dumps([value, pk], separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+
+    def page_queryset(self, queryset, request, view=None):
+        """Posortowany queryset strony wskazanej kursorem, jeszcze bez LIMIT (EXPLAIN w check_query_plans)."""
+        ordering = self.get_ordering(request, queryset, view)
+        desc = ordering.startswith('-')
+        name = ordering.lstrip('-')
+        field = self.get_field(queryset, name)
+
+        # NULLS LAST tylko dla pól nullable, żeby nie blokować indeksów na pozostałych
+        nulls_last = True if field.null else None
+        if desc:
+            queryset = queryset.order_by(F(name).desc(nulls_last=nulls_last), '-id')
+        else:
+            queryset = queryset.order_by(F(name).asc(nulls_last=nulls_last), 'id')
+
+        # wartość kursora jako adnotacja, bo pole sortowania może być poza .only()
+        queryset = queryset.annotate(cursor_value=F(name))
+
+        cursor = self.decode_cursor(request, field)
+        if cursor is not None:
+            value, pk = cursor
+            after, after_pk = ('lt', 'id__lt') if desc else ('gt', 'id__gt')
+            if value is None:
+                queryset = queryset.filter(Q(**{f'{name}__isnull': True, after_pk: pk}))
+            else:
+                predicate = Q(**{f'{name}__{after}': value}) | Q(**{name: value, after_pk: pk})
+                if field.null:
+                    # puste wartości są na końcu, więc należą do każdej dalszej strony
+                    predicate |= Q(**{f'{name}__isnull': True})
+                queryset = queryset.filter(predicate)
+        return queryset
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        queryset = self.page_queryset(queryset, request, view)
+
+        # jeden wiersz więcej mówi, czy istnieje następna strona
+        page = list(queryset[:self.page_size + 1])
+        self.has_next = len(page) > self.page_size
+        self.page = page[:self.page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        if isinstance(last, dict):  # wiersze .values() z szybkiej ścieżki serializacji
+            cursor = self.encode_cursor(last['cursor_value'], last['id'])
+        else:
+            cursor = self.encode_cursor(last.cursor_value, last.pk)
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_first_link(self):
+        return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'first': self.get_first_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'first': {'type': 'string', 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+# pola sortowania z pustymi wartościami; malejąco paginator sortuje je DESC NULLS LAST
+NULLABLE_SORT_FIELDS = ['posted_at', 'salary_min', 'salary_max']
+
+def ensure_sort_indexes(using='default'):
+    """
+    W PostgreSQL indeks DESC ma domyślnie NULLS FIRST, więc do sortowania paginatora
+    potrzebne są osobne indeksy (pole DESC NULLS LAST, id DESC). SQLite i tak trzyma
+    NULL-e na końcu przy DESC (i nie zna NULLS LAST w CREATE INDEX) - wystarczają
+    indeksy z Job.Meta. Rosnąco (ASC NULLS LAST) PostgreSQL czyta indeksy z Meta wstecz.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        if 'jobs_job' not in connection.introspection.table_names(cursor):
+            return
+        for name in NULLABLE_SORT_FIELDS:
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS jobs_job_{name}_desc_nl ON jobs_job ({name} DESC NULLS LAST, id DESC)"
+            )
@@ -0,0 +1,113 @@
+"""
+Wyszukiwanie pełnotekstowe ofert (?search=).
+
+SQLite: wirtualna tabela FTS5 jobs_job_fts (external content) utrzymywana
+triggerami, więc aktualizują ją zarówno Job.save, jak i bulk_create/update.
+PostgreSQL: funkcyjny indeks GIN na to_tsvector(JOBS_FTS_CONFIG, ...), który
+baza utrzymuje sama. Obiekty bazy tworzy ensure_search_index (post_migrate).
+
+Wyniki dostają adnotację search_rank (mniej = trafniej) i są po niej sortowane,
+o ile klient nie podał ?ordering=.
+"""
+from django.conf import settings
+from django.db import connections
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import SearchFilter
+
+FTS_TABLE = 'jobs_job_fts'
+FTS_FIELDS = ['title', 'company', 'city', 'region', 'description']
+# wagi pól w rankingu (bm25 w SQLite, setweight A-D w PostgreSQL)
+FTS_WEIGHTS = [10.0, 5.0, 2.0, 2.0, 1.0]
+PG_WEIGHT_LABELS = ['A', 'B', 'C', 'C', 'D']
+
+def fts_config():
+    # 'polish' wymaga zainstalowanego słownika (np. hunspell-pl) w PostgreSQL
+    return getattr(settings, 'JOBS_FTS_CONFIG', 'polish')
+
+def _pg_vector_sql():
+    cfg = fts_config().replace("'", "''")
+    parts = [
+        f"setweight(to_tsvector('{cfg}', coalesce({f}, '')), '{w}')"
+        for f, w in zip(FTS_FIELDS, PG_WEIGHT_LABELS)
+    ]
+    return '(' + ' || '.join(parts) + ')'
+
+def _sqlite_statements():
+    cols = ', '.join(FTS_FIELDS)
+    new_cols = ', '.join(f'new.{f}' for f in FTS_FIELDS)
+    old_cols = ', '.join(f'old.{f}' for f in FTS_FIELDS)
+    return [
+        f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON jobs_job BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, {cols}) VALUES (new.id, {new_cols});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON jobs_job BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON jobs_job BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+            INSERT INTO {FTS_TABLE}(rowid, {cols}) VALUES (new.id, {new_cols});
+        END""",
+    ]
+
+def ensure_search_index(using='default'):
+    """Tworzy (idempotentnie) indeks pełnotekstowy dla bazy `using`."""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        # migrate przed makemigrations jobs: tabeli ofert jeszcze nie ma
+        existing = connection.introspection.table_names(cursor)
+        if 'jobs_job' not in existing:
+            return
+        if connection.vendor == 'sqlite':
+            if FTS_TABLE not in existing:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5({', '.join(FTS_FIELDS)}, "
+                    f"content='jobs_job', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+                )
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+            for sql in _sqlite_statements():
+                cursor.execute(sql)
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS jobs_job_fts_gin ON jobs_job USING gin ({_pg_vector_sql()})")
+
+def _sqlite_match_query(terms):
+    # każde słowo jako fraza z dopasowaniem prefiksu: "prog"* AND "pyth"*
+    return ' AND '.join('"%s"*' % t.replace('"', '""') for t in terms)
+
+def full_text_search(queryset, terms):
+    """Zawęża queryset do ofert pasujących do wszystkich terms i dokleja search_rank.
+    Zwraca None, gdy baza nie ma obsługiwanego indeksu pełnotekstowego."""
+    vendor = connections[queryset.db].vendor
+    if vendor == 'sqlite':
+        match = _sqlite_match_query(terms)
+        weights = ', '.join(str(w) for w in FTS_WEIGHTS)
+        rank = RawSQL(
+            f"SELECT bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = jobs_job.id",
+            (match,),
+            output_field=FloatField(),
+        )
+        ids = RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,))
+        return queryset.filter(id__in=ids).annotate(search_rank=rank)
+    if vendor == 'postgresql':
+        query = "websearch_to_tsquery(%s, %s)"
+        params = (fts_config(), ' '.join(terms))
+        vector = _pg_vector_sql()
+        return (
+            queryset
+            .filter(id__in=RawSQL(f"SELECT id FROM jobs_job WHERE {vector} @@ {query}", params))
+            .annotate(search_rank=RawSQL(f"-ts_rank({vector}, {query})", params, output_field=FloatField()))
+        )
+    return None
+
+class FullTextSearchFilter(SearchFilter):
+    """SearchFilter na indeksie pełnotekstowym; na innych bazach klasyczne icontains."""
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        searched = full_text_search(queryset, terms)
+        if searched is None:
+            return super().filter_queryset(request, queryset, view)
+        return searched.order_by('search_rank', '-id')
@@ -1,7 +1,34 @@
 from rest_framework import serializers
 from .models import Job
 
-class JobSerializer(serializers.ModelSerializer):
+def requested_fields(request):
+    """Nazwy pól z ?fields=title,company (sparse fieldset) albo None, gdy parametru brak."""
+    raw = request.query_params.get('fields') if request is not None else None
+    if not raw:
+        return None
+    return [f.strip() for f in raw.split(',') if f.strip()]
+
+class SparseFieldsMixin:
+    """Zostawia w reprezentacji tylko pola wskazane w ?fields= (id zawsze)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        wanted = requested_fields(self.context.get('request'))
+        if wanted is not None:
+            keep = set(wanted) | {'id'}
+            for name in list(self.fields):
+                if name not in keep:
+                    self.fields.pop(name)
+
+class DistanceMixin(serializers.Serializer):
+    # Dystans od punktu wyszukiwania (nearby, city+radius_km); null poza wyszukiwaniem w promieniu
+    distance_km = serializers.SerializerMethodField()
+
+    def get_distance_km(self, obj):
+        d = getattr(obj, 'distance_km', None)
+        return round(d, 3) if d is not None else None
+
+class JobSerializer(SparseFieldsMixin, DistanceMixin, serializers.ModelSerializer):
     class Meta:
         model = Job
         fields = [
@@ -11,4 +38,31 @@ class JobSerializer(serializers.ModelSerializer):
             'contract_types', 'work_time', 'posted_at',
             'duties', 'requirements', 'benefits',
             'description', 'created_at', 'updated_at',
+            'distance_km',
+        ]
+
+class JobSyncSerializer(JobSerializer):
+    """Pełna oferta dla /api/jobs/changes/ (kopia offline klienta); bez distance_km, który ma sens tylko w wyszukiwaniu."""
+    distance_km = None
+
+    class Meta(JobSerializer.Meta):
+        fields = [name for name in JobSerializer.Meta.fields if name != 'distance_km']
+
+class JobListSerializer(SparseFieldsMixin, DistanceMixin, serializers.ModelSerializer):
+    """
+    Oferta na liście (list, featured, nearby): bez znaczników czasu. Aplikacja mobilna
+    otwiera szczegóły i zapisuje ofertę offline (Hive) prosto z wiersza listy, więc
+    opis, adres i sekcje listowe muszą tu zostać, dopóki nie pobiera /api/jobs/<id>/.
+    Zwartą kartę daje ?fields=, np. ?fields=title,company,location,salary_text.
+    """
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'title', 'company',
+            'address', 'city', 'region', 'location', 'latitude', 'longitude', 'is_remote',
+            'salary_text', 'salary_min', 'salary_max', 'currency',
+            'contract_types', 'work_time', 'posted_at',
+            'duties', 'requirements', 'benefits',
+            'description', 'distance_km',
         ]
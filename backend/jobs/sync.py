@@ -0,0 +1,97 @@
+"""
+Synchronizacja przyrostowa dla klienta mobilnego (/api/jobs/changes/).
+
+Kursor (base64 JSON) pamięta ostatnią wysłaną pozycję (updated_at, id), ostatni
+wysłany ślad usunięcia (JobTombstone.id) i czas wydania. Odpowiedź zawiera
+oferty zmienione po kursorze, rosnąco po (updated_at, id), id usuniętych ofert
+i nowy kursor. Bez `since` to pełna synchronizacja: wszystkie oferty, bez
+dawnych usunięć.
+
+Zmiany z ostatnich SYNC_LAG sekund czekają na kolejne wywołanie, żeby wolniej
+zatwierdzona transakcja (z wcześniejszym updated_at) nie wypadła za kursor.
+Kursor starszy niż JOBS_TOMBSTONE_DAYS jest odrzucany (ślady usunięć są już
+skasowane) - klient musi wtedy zsynchronizować się od zera.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .models import Job, JobTombstone
+
+SYNC_LAG = timedelta(seconds=5)
+
+class InvalidCursor(ValueError):
+    pass
+
+class CursorExpired(Exception):
+    pass
+
+def tombstone_retention():
+    return timedelta(days=getattr(settings, 'JOBS_TOMBSTONE_DAYS', 30))
+
+def record_tombstone(sender, instance, **kwargs):
+    """post_delete dla Job: zapisuje ślad usunięcia."""
+    JobTombstone.objects.create(job_id=instance.pk)
+
+def prune_tombstones():
+    """Kasuje ślady starsze niż JOBS_TOMBSTONE_DAYS; zwraca ich liczbę."""
+    deleted, _ = JobTombstone.objects.filter(deleted_at__lt=timezone.now() - tombstone_retention()).delete()
+    return deleted
+
+def encode_cursor(updated_at, pk, tombstone, issued_at):
+    raw = json.dumps(
+        [updated_at.isoformat() if updated_at else None, pk, tombstone, issued_at.isoformat()],
+        separators=(',', ':'),
+    ).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(encoded):
+    try:
+        updated_at, pk, tombstone, issued_at = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+        return (
+            datetime.fromisoformat(updated_at) if updated_at else None,
+            int(pk),
+            int(tombstone),
+            datetime.fromisoformat(issued_at),
+        )
+    except (TypeError, ValueError, binascii.Error, UnicodeEncodeError):
+        raise InvalidCursor('Nieprawidłowy kursor')
+
+def changes(since=None, limit=500):
+    """
+    (id zmienionych ofert w kolejności (updated_at, id), id usuniętych ofert, nowy kursor, has_more).
+    Zapytania idą po indeksach (updated_at, id) i JobTombstone.id.
+    """
+    now = timezone.now()
+    if since:
+        updated_at, pk, tombstone, issued_at = decode_cursor(since)
+        if issued_at < now - tombstone_retention():
+            raise CursorExpired('Kursor wygasł - potrzebna pełna synchronizacja')
+    else:
+        updated_at, pk = None, 0
+        tombstone = JobTombstone.objects.aggregate(last=Max('id'))['last'] or 0
+    horizon = now - SYNC_LAG
+
+    changed = Job.objects.filter(updated_at__lte=horizon)
+    if updated_at is not None:
+        changed = changed.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=pk))
+    keys = list(changed.order_by('updated_at', 'id').values_list('id', 'updated_at')[:limit + 1])
+
+    tombstones = list(
+        JobTombstone.objects.filter(id__gt=tombstone, deleted_at__lte=horizon)
+        .order_by('id').values_list('id', 'job_id')[:limit + 1]
+    )
+
+    has_more = len(keys) > limit or len(tombstones) > limit
+    keys, tombstones = keys[:limit], tombstones[:limit]
+    if keys:
+        pk, updated_at = keys[-1]
+    if tombstones:
+        tombstone = tombstones[-1][0]
+    cursor = encode_cursor(updated_at, pk, tombstone, now)
+    return [k for k, _ in keys], [job_id for _, job_id in tombstones], cursor, has_more
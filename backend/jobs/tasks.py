@@ -0,0 +1,143 @@
+"""
+Zadania Celery: scrapowanie ofert, geokodowanie i import wsadowy.
+
+Kolejki (CELERY_TASK_ROUTES w settings.py): scrape, geocode, ingest - każdą obsługuje
+osobny worker z własną współbieżnością (patrz myproject/celery.py). Limity
+`rate_limit` działają per worker; ponowienia z wykładniczym odstępem i losowym
+rozrzutem obejmują błędy sieci i bazy. Beat co godzinę zleca odświeżenie ofert
+sprawdzanych dawniej niż JOBS_REFRESH_AFTER_HOURS; checked_at jest stemplowane już
+przy zleceniu (i przy nieudanym pobraniu), więc ta sama oferta nie trafia do kolejki
+drugi raz, a martwe URL-e nie blokują paczki co godzinę.
+"""
+from datetime import timedelta
+
+import requests
+from celery import shared_task
+from celery.signals import worker_process_shutdown
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .cache import invalidate
+from .facets import refresh_facet_table
+from .management.commands.bulk_ingest import ingest, read_records
+from .management.commands.fetcher import TieredFetcher
+from .management.commands.geocoder import default_geocoder
+from .management.commands.scrape_jobs import load_validators, save_job
+from .models import Job
+from .sync import prune_tombstones as _prune_tombstones
+
+class ScrapeFailed(Exception):
+    """Żaden tier fetchera nie zwrócił oferty - zadanie zostanie ponowione."""
+
+RETRY = dict(retry_backoff=30, retry_backoff_max=30 * 60, retry_jitter=True)
+
+# Jeden fetcher na proces workera: sesja HTTP i przeglądarka żyją między zadaniami
+_fetchers = {}
+
+def get_fetcher(source_name):
+    if source_name not in _fetchers:
+        _fetchers[source_name] = TieredFetcher(source_name=source_name)
+    return _fetchers[source_name]
+
+@worker_process_shutdown.connect
+def _close_fetchers(**kwargs):
+    for fetcher in _fetchers.values():
+        fetcher.close()
+    _fetchers.clear()
+
+@shared_task(autoretry_for=(ScrapeFailed, requests.RequestException, DatabaseError),
+             max_retries=3, rate_limit='30/m', acks_late=True, **RETRY)
+def scrape_offer(url, source_name='pracuj.pl'):
+    """Pobiera (warunkowo, jeśli oferta jest znana) i zapisuje jedną ofertę."""
+    data = get_fetcher(source_name).fetch(url, load_validators([url]).get(url))
+    if not data:
+        # następna próba z refresh_stale_offers dopiero po JOBS_REFRESH_AFTER_HOURS
+        Job.objects.filter(source_url=url).update(checked_at=timezone.now())
+        raise ScrapeFailed(url)
+    job, created, changed = save_job(data, url)
+    return {'url': url, 'created': created, 'changed': changed}
+
+@shared_task(autoretry_for=(DatabaseError,), max_retries=5, rate_limit='1/s', **RETRY)
+def geocode_job(job_id):
+    """Uzupełnia współrzędne oferty (cache, gazetteer, Nominatim - patrz geocoder.py)."""
+    job = Job.objects.filter(id=job_id).only('address', 'city', 'region').first()
+    if job is None:
+        return None
+    lat, lon = default_geocoder().geocode(job.address, job.city, job.region)
+    if lat is not None:
+        Job.objects.filter(id=job_id).update(latitude=lat, longitude=lon, updated_at=timezone.now())
+        invalidate()
+    return lat, lon
+
+@shared_task(autoretry_for=(DatabaseError,), max_retries=3, acks_late=True, **RETRY)
+def ingest_file(path, batch_size=1000, source_name=''):
+    """bulk_ingest w tle: upsert rekordów z pliku JSONL dostępnego dla workera."""
+    errors = []
+    totals = dict(rows=0, inserted=0, updated=0, unchanged=0, skipped=0, seconds=0.0)
+    with open(path, encoding='utf-8') as f:
+        for batch in ingest(read_records(f, errors), batch_size, source_name, errors):
+            for key in totals:
+                totals[key] += batch[key]
+    totals['errors'] = len(errors)
+    return totals
+
+@shared_task
+def refresh_stale_offers(max_age_hours=None, limit=None):
+    """
+    Zleca scrape_offer dla ofert najdawniej sprawdzanych (nigdy - najpierw). Przed
+    wysłaniem oznacza je jako sprawdzone teraz, żeby kolejne uruchomienie ich nie dublowało.
+    """
+    max_age = timedelta(hours=max_age_hours or settings.JOBS_REFRESH_AFTER_HOURS)
+    now = timezone.now()
+    with transaction.atomic():
+        stale = list(
+            Job.objects
+            .filter(source_url__gt='')
+            .filter(Q(checked_at__isnull=True) | Q(checked_at__lt=now - max_age))
+            .order_by(F('checked_at').asc(nulls_first=True), 'id')
+            .values_list('id', 'source_url', 'source_name')[:limit or settings.JOBS_REFRESH_BATCH]
+        )
+        Job.objects.filter(id__in=[pk for pk, _, _ in stale]).update(checked_at=now)
+    for _, url, source_name in stale:
+        scrape_offer.delay(url, source_name or 'pracuj.pl')
+    return len(stale)
+
+@shared_task(autoretry_for=(DatabaseError,), max_retries=5, **RETRY)
+def geocode_jobs(job_ids):
+    """
+    Geokoduje paczkę ofert przez geocode_many: oferty z tym samym adresem kosztują jedno
+    zapytanie. Limit Nominatim pilnuje sam geokoder (min_interval), nie rate_limit zadania.
+    """
+    jobs = list(Job.objects.filter(id__in=job_ids, latitude__isnull=True).only('address', 'city', 'region'))
+    places = default_geocoder().geocode_many((j.address, j.city, j.region) for j in jobs)
+    now = timezone.now()
+    found = []
+    for job in jobs:
+        job.latitude, job.longitude = places[(job.address, job.city, job.region)]
+        if job.latitude is not None:
+            job.updated_at = now
+            found.append(job)
+    if found:
+        Job.objects.bulk_update(found, ['latitude', 'longitude', 'updated_at'])
+        invalidate()
+    return len(found)
+
+@shared_task
+def geocode_missing(limit=500, batch_size=100):
+    """Zleca geocode_jobs paczkami dla ofert bez współrzędnych."""
+    ids = list(Job.objects.filter(latitude__isnull=True).order_by('-id').values_list('id', flat=True)[:limit])
+    for start in range(0, len(ids), batch_size):
+        geocode_jobs.delay(ids[start:start + batch_size])
+    return len(ids)
+
+@shared_task
+def prune_tombstones():
+    """Kasuje ślady usunięć starsze niż JOBS_TOMBSTONE_DAYS (/api/jobs/changes/)."""
+    return _prune_tombstones()
+
+@shared_task
+def refresh_facets():
+    """Przelicza tabelę JobFacetCount (facety /api/jobs/facets/ bez filtrów); None, gdy przeliczenie już trwa."""
+    return refresh_facet_table()
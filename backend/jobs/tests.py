@@ -0,0 +1,454 @@
+import tempfile
+import threading
+import unittest
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from jobs import facets
+from jobs.management.commands.bulk_ingest import ingest
+from jobs.management.commands.capture import CaptureStore
+from jobs.management.commands.driver_pool import DriverPool
+from jobs.management.commands.fetcher import TieredFetcher
+from jobs.management.commands.geocoder import Geocoder, normalize_address
+from jobs.management.commands.scrape_jobs import save_job
+from jobs.management.commands import fetcher as fetcher_module, scraper
+from jobs.management.commands.scraper import scrape_job
+from jobs.models import GeocodeCache
+from jobs.models import Job, JobFacetCount
+from jobs.pagination import JobKeysetPagination
+from jobs.views import JobViewSet
+
+try:
+    from myproject.celery import app as celery_app
+    from jobs import tasks
+except ImportError:  # pragma: no cover - celery jest opcjonalny
+    celery_app = tasks = None
+
+class OfferPages(BaseHTTPRequestHandler):
+    """Lokalne strony ofert: /oferta/<n> z tytułem, /bez-tytulu/<n> bez <h1>, /blad/<n> z kodem 500."""
+    protocol_version = 'HTTP/1.1'  # keep-alive, żeby było widać ponowne użycie połączeń
+
+    def do_GET(self):
+        self.server.connections.add(self.client_address)
+        if self.path.startswith('/oferta/'):
+            status, body = 200, f'<html><body><h1>Oferta {self.path.rsplit("/", 1)[1]}</h1></body></html>'
+        elif self.path.startswith('/bez-tytulu/'):
+            status, body = 200, '<html><body><p>Praca w Łódź, łódzkie</p></body></html>'
+        else:
+            status, body = 500, 'błąd'
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+class StubBackend:
+    """Backend geokodera bez sieci: odpowiedzi z mapy znormalizowany adres -> (lat, lon)."""
+    def __init__(self, places):
+        self.places = places
+        self.calls = []
+
+    def __call__(self, query):
+        self.calls.append(query)
+        return self.places.get(normalize_address(query))
+
+class FakeDriver:
+    def quit(self):
+        pass
+
+class FixtureServerTestCase(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), OfferPages)
+        cls.server.daemon_threads = True
+        cls.server.connections = set()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f'http://127.0.0.1:{cls.server.server_address[1]}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.connections.clear()
+
+class DriverPoolTests(FixtureServerTestCase):
+    def fetcher_factory(self, scrape=None):
+        def factory(**kwargs):
+            return TieredFetcher(driver_factory=FakeDriver, scrape=scrape or (lambda url, **kw: {}), **kwargs)
+        return factory
+
+    def test_every_url_returns_its_own_offer(self):
+        urls = [f'{self.base}/oferta/{i}' for i in range(20)]
+        pool = DriverPool(workers=4, fetcher_factory=self.fetcher_factory())
+        results = dict(pool.run(urls))
+        self.assertEqual(set(results), set(urls))
+        for i, url in enumerate(urls):
+            self.assertEqual(results[url]['title'], f'Oferta {i}')
+        self.assertEqual(sum(s.tiers['http'] for s in pool.stats), 20)
+
+    def test_single_worker_keeps_input_order_and_dedupes(self):
+        urls = [f'{self.base}/oferta/{i}' for i in (3, 1, 2, 1)]
+        pool = DriverPool(workers=1, fetcher_factory=self.fetcher_factory())
+        self.assertEqual([url for url, _ in pool.run(urls)], list(dict.fromkeys(urls)))
+
+    def test_workers_reuse_http_connections(self):
+        urls = [f'{self.base}/oferta/{i}' for i in range(12)]
+        pool = DriverPool(workers=3, fetcher_factory=self.fetcher_factory())
+        list(pool.run(urls))
+        # sesja każdego workera trzyma keep-alive: najwyżej jedno połączenie na worker
+        self.assertLessEqual(len(self.server.connections), 3)
+
+    def test_browser_recycled_after_n_pages(self):
+        urls = [f'{self.base}/oferta/{i}' for i in range(7)]
+        pool = DriverPool(workers=1, recycle_after=3, http_first=False,
+                          fetcher_factory=self.fetcher_factory(lambda url, **kw: {'title': url}))
+        results = dict(pool.run(urls))
+        self.assertEqual(results[urls[0]], {'title': urls[0]})
+        self.assertEqual(pool.stats[0].drivers_started, 3)  # 3 + 3 + 1 strony
+
+    def test_failures_still_produce_results(self):
+        def broken_scrape(url, **kwargs):
+            raise RuntimeError('przeglądarka padła')
+        urls = [f'{self.base}/blad/{i}' for i in range(3)] + [f'{self.base}/oferta/9']
+        pool = DriverPool(workers=2, fetcher_factory=self.fetcher_factory(broken_scrape))
+        results = dict(pool.run(urls))
+        self.assertEqual(len(results), 4)
+        self.assertEqual(results[urls[-1]]['title'], 'Oferta 9')
+        self.assertEqual([results[u] for u in urls[:3]], [{}, {}, {}])
+        self.assertEqual(sum(s.errors for s in pool.stats), 3)
+
+class RenderedDriver(FakeDriver):
+    """Przeglądarka bez przeglądarki: page_source to DOM po "renderowaniu" (inne formatowanie niż surowy HTML)."""
+    def __init__(self, html):
+        self.page_source = html
+
+    def get(self, url):
+        pass
+
+    def find_element(self, *args):
+        return object()
+
+class ContentHashTests(FixtureServerTestCase):
+    def test_http_and_browser_tiers_hash_the_same_page_alike(self):
+        fetcher = TieredFetcher(driver_factory=FakeDriver, scrape=lambda url, **kw: {})
+        http = fetcher.fetch(f'{self.base}/oferta/1')
+        rendered = '<html><head></head><body>\n  <h1>Oferta   1</h1>\n</body></html>'
+        browser = scrape_job(f'{self.base}/oferta/1', driver=RenderedDriver(rendered))
+        self.assertEqual(http['content_hash'], browser['content_hash'])
+        again = fetcher.fetch(f'{self.base}/oferta/1', {'content_hash': browser['content_hash']})
+        self.assertTrue(again['not_modified'])
+
+class GeocodeOnceTests(FixtureServerTestCase):
+    def test_escalated_page_is_geocoded_once_from_browser_result(self):
+        def browser(url, **kwargs):
+            self.assertFalse(kwargs['geocode'])
+            return {'title': 'Oferta', 'company': '', 'address': 'ul. Długa 5', 'city': 'Łódź', 'region': ''}
+        fetcher = TieredFetcher(driver_factory=FakeDriver, scrape=browser)
+        with mock.patch.object(scraper, 'geocode_address', return_value=(51.77, 19.46)) as geocode:
+            data = fetcher.fetch(f'{self.base}/bez-tytulu/1')
+        self.assertEqual(fetcher.tiers['browser'], 1)
+        geocode.assert_called_once_with('ul. Długa 5, Łódź', 'Łódź', '')
+        self.assertEqual((data['latitude'], data['longitude']), (51.77, 19.46))
+
+    def test_http_result_is_geocoded_once(self):
+        fetcher = TieredFetcher(driver_factory=FakeDriver, scrape=lambda url, **kw: {})
+        with mock.patch.object(fetcher_module, 'geocode_offer', wraps=scraper.geocode_offer) as geocode:
+            data = fetcher.fetch(f'{self.base}/oferta/1')
+        self.assertEqual(fetcher.tiers['http'], 1)
+        geocode.assert_called_once_with(data)
+
+class SaveJobTests(TestCase):
+    def test_city_change_updates_derived_location(self):
+        Job.objects.create(title='Oferta', city='Łódź', source_url='https://example.com/1')
+        job, created, changed = save_job({'title': 'Oferta', 'city': 'Poznań'}, 'https://example.com/1')
+        self.assertFalse(created)
+        job.refresh_from_db()
+        self.assertEqual((job.location, job.city_key), ('Poznań', 'poznań'))
+        self.assertIn('location', changed)
+
+    def test_empty_location_is_saved_with_update_fields(self):
+        job = Job.objects.create(title='Oferta', source_url='https://example.com/2')
+        Job.objects.filter(pk=job.pk).update(location='')
+        save_job({'title': 'Oferta 2'}, 'https://example.com/2')
+        job.refresh_from_db()
+        self.assertEqual(job.title, 'Oferta 2')
+        self.assertEqual(job.location, '')
+        job.region = 'Mazowieckie'
+        job.save(update_fields=['region'])
+        job.refresh_from_db()
+        self.assertEqual(job.location, 'Mazowieckie')
+
+@unittest.skipIf(celery_app is None, 'celery nie jest zainstalowany')
+@override_settings(JOBS_REFRESH_AFTER_HOURS=24, JOBS_REFRESH_BATCH=500)
+class TaskTests(TestCase):
+    """Zadania publikują do brokera w pamięci (memory://); kolejki czytamy wprost z kombu."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # klucze z przestrzenią nazw CELERY_ jak w myproject/celery.py; pula połączeń powstaje
+        # leniwie przy pierwszym zleceniu, więc zmiana przed testami wystarcza
+        cls.broker = {key: celery_app.conf[key] for key in ('CELERY_BROKER_URL', 'CELERY_BROKER_TRANSPORT_OPTIONS')}
+        celery_app.conf.update(CELERY_BROKER_URL='memory://', CELERY_BROKER_TRANSPORT_OPTIONS={})
+
+    @classmethod
+    def tearDownClass(cls):
+        celery_app.conf.update(cls.broker)
+        super().tearDownClass()
+
+    def drain(self, queue):
+        """(nazwa zadania, argumenty) wiadomości z kolejki, po kolei."""
+        messages = []
+        with celery_app.connection_for_read() as conn:
+            simple = conn.SimpleQueue(queue)
+            while True:
+                try:
+                    message = simple.get(block=False)
+                except simple.Empty:
+                    break
+                messages.append((message.headers['task'], message.headers['argsrepr']))
+                message.ack()
+            simple.close()
+        return messages
+
+    def setUp(self):
+        self.drain('scrape')
+        self.drain('geocode')
+
+    def make_job(self, n, checked_at):
+        return Job.objects.create(title=f'Oferta {n}', source_url=f'https://example.com/oferta/{n}',
+                                  source_name='pracuj.pl', checked_at=checked_at)
+
+    def test_refresh_enqueues_each_stale_offer_once(self):
+        now = timezone.now()
+        never = self.make_job(1, None)
+        old = self.make_job(2, now - timedelta(days=3))
+        self.make_job(3, now - timedelta(hours=1))
+
+        self.assertEqual(tasks.refresh_stale_offers(), 2)
+        self.assertEqual(self.drain('scrape'), [
+            ('jobs.tasks.scrape_offer', repr((never.source_url, 'pracuj.pl'))),
+            ('jobs.tasks.scrape_offer', repr((old.source_url, 'pracuj.pl'))),
+        ])
+        # oferty są oznaczone przy zleceniu - kolejne uruchomienie ich nie dubluje
+        self.assertEqual(tasks.refresh_stale_offers(), 0)
+        self.assertEqual(self.drain('scrape'), [])
+
+    def test_failed_scrape_stamps_checked_at(self):
+        job = self.make_job(1, timezone.now() - timedelta(days=3))
+        fetcher = mock.Mock(fetch=mock.Mock(return_value={}))
+        with mock.patch.object(tasks, 'get_fetcher', return_value=fetcher):
+            with self.assertRaises(tasks.ScrapeFailed):
+                tasks.scrape_offer.run(job.source_url)
+        job.refresh_from_db()
+        self.assertGreater(job.checked_at, timezone.now() - timedelta(minutes=1))
+        # martwy URL nie wraca do następnej paczki
+        self.assertEqual(tasks.refresh_stale_offers(), 0)
+
+    def test_geocode_missing_batches_on_geocode_queue(self):
+        ids = [Job.objects.create(title=f'Bez współrzędnych {i}', city='Łódź').id for i in range(3)]
+        Job.objects.create(title='Z współrzędnymi', latitude=51.76, longitude=19.45)
+        self.assertEqual(tasks.geocode_missing(batch_size=2), 3)
+        newest = sorted(ids, reverse=True)
+        self.assertEqual(self.drain('geocode'), [
+            ('jobs.tasks.geocode_jobs', repr((newest[:2],))),
+            ('jobs.tasks.geocode_jobs', repr((newest[2:],))),
+        ])
+
+    def test_geocode_jobs_asks_once_per_address(self):
+        backend = StubBackend({'ul. piotrkowska 1, łódź': (51.77, 19.46)})
+        jobs = [Job.objects.create(title=f'Oferta {i}', address='ul. Piotrkowska 1, Łódź') for i in range(3)]
+        with mock.patch.object(tasks, 'default_geocoder', return_value=Geocoder(backend=backend, min_interval=0)):
+            self.assertEqual(tasks.geocode_jobs.run([j.id for j in jobs]), 3)
+        self.assertEqual(backend.calls, ['ul. Piotrkowska 1, Łódź'])
+        self.assertEqual(Job.objects.filter(latitude=51.77).count(), 3)
+
+class GeocoderTests(TestCase):
+    def setUp(self):
+        self.backend = StubBackend({'acme, ul. długa 5': (52.1, 21.0)})
+        self.geocoder = Geocoder(backend=self.backend, min_interval=0)
+
+    def test_hits_and_misses_are_cached(self):
+        self.assertEqual(self.geocoder.geocode('ACME,  ul. Długa 5'), (52.1, 21.0))
+        self.assertEqual(self.geocoder.geocode('acme, ul. długa 5'), (52.1, 21.0))
+        self.assertEqual(self.geocoder.geocode('Nieistniejąca 1'), (None, None))
+        self.assertEqual(self.geocoder.geocode('nieistniejąca 1'), (None, None))
+        self.assertEqual(len(self.backend.calls), 2)
+        self.assertEqual(GeocodeCache.objects.get(query='nieistniejąca 1').latitude, None)
+        # nowy proces: pamięć pusta, wynik z bazy
+        fresh = Geocoder(backend=self.backend, min_interval=0)
+        self.assertEqual(fresh.geocode('acme, ul. długa 5'), (52.1, 21.0))
+        self.assertEqual(fresh.stats['cache'], 1)
+        self.assertEqual(len(self.backend.calls), 2)
+
+    def test_negative_entries_expire_from_memory_and_db(self):
+        self.geocoder.geocode('Nieistniejąca 1')
+        later = timezone.now() + self.geocoder.negative_ttl + timedelta(minutes=1)
+        with mock.patch('jobs.management.commands.geocoder.timezone.now', return_value=later):
+            self.geocoder.geocode('Nieistniejąca 1')
+        self.assertEqual(len(self.backend.calls), 2)
+
+    def test_memo_is_bounded(self):
+        geocoder = Geocoder(backend=self.backend, min_interval=0, memo_size=2)
+        for n in range(5):
+            geocoder.geocode(f'Adres {n}')
+        self.assertEqual(len(geocoder._memo), 2)
+
+    def test_city_falls_back_to_gazetteer_without_network(self):
+        lat, lon = self.geocoder.geocode('', 'Łódź')
+        self.assertAlmostEqual(lat, 51.76, delta=0.2)
+        self.assertAlmostEqual(lon, 19.46, delta=0.2)
+        self.assertEqual(self.backend.calls, [])
+
+    def test_geocode_many_dedupes_addresses(self):
+        items = [('ACME, ul. Długa 5', '', ''), ('acme,ul. długa 5', '', ''), ('Inna 2', '', '')]
+        results = self.geocoder.geocode_many(items)
+        self.assertEqual(results[items[0]], (52.1, 21.0))
+        self.assertEqual(results[items[1]], (52.1, 21.0))
+        self.assertEqual(results[items[2]], (None, None))
+        self.assertEqual(len(self.backend.calls), 2)
+
+class CaptureStoreTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = CaptureStore(tmp.name, sample_rate=1.0)
+
+    def test_writer_survives_unexpected_error(self):
+        with mock.patch.object(self.store, '_compress', side_effect=[ValueError('zły HTML'), b'ok']):
+            self.store.capture('https://example.com/a', '<html>a</html>', ok=False)
+            self.store.capture('https://example.com/b', '<html>b</html>', ok=False)
+            self.store.flush()
+        self.assertEqual(self.store.stats['errors'], 1)
+        self.assertEqual(self.store.stats['failed'], 1)
+        self.assertTrue(self.store._thread.is_alive())
+
+class KeysetPaginationTests(TestCase):
+    def paginate(self, params):
+        request = Request(APIRequestFactory().get('/api/jobs/', params))
+        paginator = JobKeysetPagination()
+        page = paginator.paginate_queryset(Job.objects.all(), request, JobViewSet())
+        return paginator, request, page
+
+    def walk(self, params):
+        ids, cursor = [], None
+        while True:
+            paginator, _, page = self.paginate({**params, **({'cursor': cursor} if cursor else {})})
+            ids += [job.id for job in page]
+            if not paginator.has_next:
+                return ids
+            last = page[-1]
+            cursor = paginator.encode_cursor(last.cursor_value, last.pk)
+
+    def test_walks_nullable_field_with_nulls_last(self):
+        jobs = [Job.objects.create(title=f'Oferta {i}', salary_min=[None, 5000, 7000][i % 3]) for i in range(7)]
+        expected = [j.id for j in sorted(jobs, key=lambda j: (j.salary_min is None, -(j.salary_min or 0), -j.id))]
+        self.assertEqual(self.walk({'ordering': '-salary_min', 'page_size': 2}), expected)
+
+    def test_cursor_on_non_null_field_has_no_null_branch(self):
+        request = Request(APIRequestFactory().get('/api/jobs/', {'cursor': JobKeysetPagination().encode_cursor(timezone.now(), 1)}))
+        sql = str(JobKeysetPagination().page_queryset(Job.objects.all(), request, JobViewSet()).query)
+        self.assertNotIn('IS NULL', sql)
+
+    def test_page_size_is_clamped(self):
+        for raw, expected in [('5', 5), ('1000', 100), ('0', 20), ('-3', 20), ('abc', 20)]:
+            paginator = JobKeysetPagination()
+            self.assertEqual(paginator.get_page_size(Request(APIRequestFactory().get('/', {'page_size': raw}))), expected)
+
+class StoredFacetsTests(TestCase):
+    def setUp(self):
+        cache.delete(facets.REFRESH_LOCK)
+        self.addCleanup(cache.delete, facets.REFRESH_LOCK)
+        Job.objects.create(title='Oferta', city='Łódź')
+
+    def test_stale_rows_served_while_refresh_is_running(self):
+        facets.refresh_facet_table()
+        JobFacetCount.objects.update(refreshed_at=timezone.now() - timedelta(days=1))
+        Job.objects.create(title='Oferta 2', city='Łódź')
+        cache.add(facets.REFRESH_LOCK, 1)
+        with mock.patch.object(facets, 'compute_facets') as compute:
+            data = facets.stored_facets(10)
+        compute.assert_not_called()
+        self.assertEqual(data['count'], 1)
+
+    def test_stale_table_is_refreshed_by_lock_holder(self):
+        facets.refresh_facet_table()
+        JobFacetCount.objects.update(refreshed_at=timezone.now() - timedelta(days=1))
+        Job.objects.create(title='Oferta 2', city='Łódź')
+        self.assertEqual(facets.stored_facets(10)['count'], 2)
+        self.assertIsNone(cache.get(facets.REFRESH_LOCK))
+
+    def test_empty_table_computed_live_when_refresh_is_running(self):
+        cache.add(facets.REFRESH_LOCK, 1)
+        with mock.patch.object(facets, 'WAIT_STEPS', 1):
+            data = facets.stored_facets(10)
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(data['facets']['city'], [{'value': 'Łódź', 'count': 1}])
+        self.assertFalse(JobFacetCount.objects.exists())
+
+class JobPayloadTests(TestCase):
+    def setUp(self):
+        self.job = Job.objects.create(
+            title='Oferta', company='ACME', address='ul. Długa 5, Łódź', city='Łódź',
+            description='Opis', duties=['a'], requirements=['b'], benefits=['c'],
+            contract_types=['UoP'], work_time='pełny etat',
+        )
+
+    def test_list_keeps_fields_rendered_by_the_client(self):
+        for fast in (False, True):
+            with self.subTest(fast=fast), override_settings(JOBS_FAST_SERIALIZER=fast, JOBS_CACHE_TIMEOUT=0):
+                row = self.client.get('/api/jobs/').json()['results'][0]
+                for name in ('description', 'duties', 'requirements', 'benefits', 'address', 'contract_types', 'work_time'):
+                    self.assertIn(name, row)
+                self.assertEqual((row['description'], row['duties']), ('Opis', ['a']))
+                self.assertNotIn('updated_at', row)
+
+    def test_sparse_fieldset(self):
+        row = self.client.get('/api/jobs/', {'fields': 'title,company'}).json()['results'][0]
+        self.assertEqual(set(row), {'id', 'title', 'company'})
+
+    def test_changes_returns_full_records(self):
+        Job.objects.update(updated_at=timezone.now() - timedelta(minutes=1))  # poza SYNC_LAG
+        for fast in (False, True):
+            with self.subTest(fast=fast), override_settings(JOBS_FAST_SERIALIZER=fast):
+                row = self.client.get('/api/jobs/changes/').json()['changed'][0]
+                for name in ('description', 'duties', 'requirements', 'benefits', 'address',
+                             'contract_types', 'work_time', 'updated_at'):
+                    self.assertIn(name, row)
+                self.assertEqual(row['benefits'], ['c'])
+                self.assertNotIn('distance_km', row)
+
+class BulkIngestTests(TestCase):
+    def test_invalid_records_are_reported_not_dropped_silently(self):
+        errors = []
+        records = [
+            {'source_url': 'https://example.com/1', 'title': None},
+            {'source_url': 'https://example.com/2', 'title': 'Oferta', 'posted_at': '2025-13-45'},
+            {'source_url': 'https://example.com/3', 'title': 'Oferta', 'city': 'Łódź', 'contract_types': ['B2B']},
+        ]
+        (batch,) = ingest(records, errors=errors)
+        self.assertEqual((batch['inserted'], batch['invalid']), (1, 2))
+        self.assertEqual([where for where, _ in errors], ['https://example.com/1', 'https://example.com/2'])
+        job = Job.objects.get()
+        self.assertEqual((job.location, job.city_key, job.contract_types, job.duties), ('Łódź', 'łódź', ['B2B'], []))
+
+    def test_reingest_updates_only_present_fields(self):
+        list(ingest([{'source_url': 'https://example.com/1', 'title': 'A', 'company': 'ACME'}]))
+        (batch,) = ingest([{'source_url': 'https://example.com/1', 'title': 'B'}])
+        self.assertEqual(batch['updated'], 1)
+        self.assertEqual(Job.objects.values_list('title', 'company').get(), ('B', 'ACME'))
@@ -1,11 +1,47 @@
-from math import radians, cos, sin, asin, sqrt
+from math import radians, cos, sin, asin, degrees
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+def haversine_km_batch(lat, lon, lats, lons, radius_km=None):
+    """
+    Odległości (km) od jednego punktu do tablic współrzędnych lats/lons.
+    Zwraca (distances, mask): mask wskazuje punkty w promieniu radius_km
+    (albo wszystkie z poprawnymi współrzędnymi, gdy radius_km jest None).
+    Brakujące współrzędne (None/NaN) dają dystans NaN i False w masce.
+    """
+    lats = np.radians(np.asarray(lats, dtype=np.float64))
+    lons = np.radians(np.asarray(lons, dtype=np.float64))
+    lat0, lon0 = radians(lat), radians(lon)
+    a = np.sin((lats - lat0) / 2) ** 2 + cos(lat0) * np.cos(lats) * np.sin((lons - lon0) / 2) ** 2
+    distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+    if radius_km is None:
+        mask = ~np.isnan(distances)
+    else:
+        mask = distances <= radius_km
+    return distances, mask
 
 def haversine_km(lat1, lon1, lat2, lon2):
     if None in (lat1, lon1, lat2, lon2):
         return None
-    R = 6371.0
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-    a = sin(dlat/2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2) ** 2
-    c = 2 * asin(sqrt(a))
-    return R * c
+    distances, _ = haversine_km_batch(lat1, lon1, (lat2,), (lon2,))
+    return float(distances[0])
+
+def bounding_box(lat, lon, radius_km):
+    """
+    Prostokąt (min_lat, max_lat, min_lon, max_lon) obejmujący okrąg o promieniu radius_km.
+    Gdy okrąg obejmuje biegun albo przecina południk 180°, zakres długości to None (bez filtra).
+    """
+    dlat = degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = lat - dlat, lat + dlat
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90.0), min(max_lat, 90.0), None, None
+    x = sin(radius_km / EARTH_RADIUS_KM) / cos(radians(lat))
+    if x >= 1:
+        return min_lat, max_lat, None, None
+    dlon = degrees(asin(x))
+    min_lon, max_lon = lon - dlon, lon + dlon
+    if min_lon < -180 or max_lon > 180:
+        return min_lat, max_lat, None, None
+    return min_lat, max_lat, min_lon, max_lon
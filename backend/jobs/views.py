@@ -1,19 +1,32 @@
 from rest_framework import viewsets, permissions, filters, status
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from django_filters import rest_framework as df
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from django.conf import settings
-from pathlib import Path
-import json
+from django.db import connections
+from django.http import HttpResponse, StreamingHttpResponse
+import heapq
 
-from .models import Job
-from .serializers import JobSerializer
-from .utils import haversine_km
+from .models import Job, fold_city
+from .cache import cached_data, conditional, make_etag, watermark
+from .serializers import JobSerializer, JobListSerializer, JobSyncSerializer, requested_fields
+from .gazetteer import gazetteer
+from .pagination import JobKeysetPagination
+from .export import CSVRenderer, NDJSONRenderer, stream_export
+from .facets import compute_facets, facets_limit, format_facets, stored_facets
+from .fast import FastJobSerializer, FastJSONRenderer
+from .search import FullTextSearchFilter
+from .sync import CursorExpired, InvalidCursor, changes
+from .utils import haversine_km_batch, bounding_box
+
+# górna granica przedziału prefiksu city_key (największy punkt kodowy)
+CITY_KEY_MAX = '\U0010ffff'
 
 class JobFilter(df.FilterSet):
-    city = df.CharFilter(field_name='city', lookup_expr='icontains')
+    city = df.CharFilter(method='filter_city')
     region = df.CharFilter(field_name='region', lookup_expr='icontains')
     is_remote = df.BooleanFilter(field_name='is_remote')
     min_salary = df.NumberFilter(field_name='salary_min', lookup_expr='gte')
@@ -23,73 +36,267 @@ class JobFilter(df.FilterSet):
         model = Job
         fields = ['city', 'region', 'is_remote']
 
+    def filter_city(self, queryset, name, value):
+        # z poprawnym radius_km miasto jest tylko środkiem okręgu (JobViewSet.filter_radius)
+        if radius_center(self.data) is not None:
+            return queryset
+        key = fold_city(value)
+        if not key:
+            return queryset
+        # prefiks na indeksie city_key: ?city=pozn trafia w "Poznań"
+        if connections[queryset.db].vendor == 'postgresql':
+            return queryset.filter(city_key__startswith=key)  # LIKE 'x%' na varchar_pattern_ops
+        # LIKE w SQLite nie rozróżnia wielkości liter i omija indeks - przedział porównuje bajty
+        return queryset.filter(city_key__gte=key, city_key__lt=key + CITY_KEY_MAX)
+
+def radius_center(params):
+    """
+    (lat, lon, promień_km) dla ?city=...&radius_km=...; None, gdy radius_km nie jest
+    liczbą dodatnią albo miasta nie ma w gazetteerze - wtedy city działa jak zwykły filtr.
+    """
+    city_name, radius_km = params.get('city'), params.get('radius_km')
+    if not city_name or not radius_km:
+        return None
+    try:
+        radius = float(radius_km)
+    except ValueError:
+        return None
+    city = gazetteer.lookup(city_name) if radius > 0 else None
+    if not city:
+        return None
+    return float(city['lat']), float(city['lon']), radius
+
+def within_bounding_box(queryset, lat, lon, radius):
+    """Oferty z queryset w prostokącie wokół okręgu - prefiltr na indeksie (latitude, longitude)."""
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius)
+    candidates = queryset.filter(latitude__range=(min_lat, max_lat))
+    if min_lon is not None:
+        return candidates.filter(longitude__range=(min_lon, max_lon))
+    return candidates.exclude(longitude__isnull=True)
+
+def distances_within_radius(queryset, lat, lon, radius):
+    """
+    Zwraca {id: dystans_km} dla ofert z queryset leżących w promieniu radius (km) od punktu.
+    Baza zawęża kandydatów prostokątem na indeksowanych latitude/longitude,
+    dokładny dystans liczony jest tylko dla tych, które przeszły prefiltr.
+    """
+    rows = list(within_bounding_box(queryset, lat, lon, radius).values_list('id', 'latitude', 'longitude'))
+    if not rows:
+        return {}
+    ids, lats, lons = zip(*rows)
+    distances, mask = haversine_km_batch(lat, lon, lats, lons, radius)
+    return {pk: d for pk, d, inside in zip(ids, distances.tolist(), mask.tolist()) if inside}
+
+def attach_distances(jobs, distances):
+    """Dokleja distance_km (czytane przez serializery) do ofert lub wierszy .values() i zwraca listę."""
+    jobs = list(jobs)
+    for j in jobs:
+        if isinstance(j, dict):
+            j['distance_km'] = distances.get(j['id'])
+        else:
+            j.distance_km = distances.get(j.id)
+    return jobs
+
+def job_id(job):
+    return job['id'] if isinstance(job, dict) else job.id
+
 class JobViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Job.objects.all().order_by('-created_at')
     serializer_class = JobSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = JobKeysetPagination
     filterset_class = JobFilter
-    filter_backends = [df.DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [df.DjangoFilterBackend, FullTextSearchFilter, filters.OrderingFilter]
     search_fields = ['title', 'company', 'city', 'region', 'description']
     ordering_fields = ['created_at', 'posted_at', 'salary_min', 'salary_max']
 
+    def get_serializer_class(self):
+        # listy bez znaczników czasu (JobListSerializer); szczegóły i ?fields= - wszystkie pola
+        if self.action == 'changes':
+            return JobSyncSerializer
+        if self.action == 'retrieve' or requested_fields(self.request) is not None:
+            return JobSerializer
+        return JobListSerializer
+
+    def only_fields(self):
+        """Kolumny potrzebne wybranemu serializerowi (do .only())."""
+        serializer = self.get_serializer()
+        columns = {f.name for f in Job._meta.concrete_fields}
+        return ['id'] + [name for name in serializer.fields if name in columns and name != 'id']
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if getattr(settings, 'JOBS_FAST_SERIALIZER', False):
+            renderers = [FastJSONRenderer() if type(r) is JSONRenderer else r for r in renderers]
+        return renderers
+
+    def fast_serializer(self):
+        """FastJobSerializer dla endpointów listowych, gdy włączono JOBS_FAST_SERIALIZER."""
+        if getattr(settings, 'JOBS_FAST_SERIALIZER', False) and self.action in ('list', 'featured', 'nearby', 'changes'):
+            return FastJobSerializer(self.get_serializer())
+        return None
+
+    def job_rows(self, queryset):
+        """Queryset instancji (.only()) albo słowników (.values()) dla szybkiej ścieżki."""
+        fast = self.fast_serializer()
+        if fast is not None:
+            return fast.values(queryset)
+        return queryset.only(*self.only_fields())
+
+    def serialize_jobs(self, jobs, distances=None):
+        if distances is not None:
+            jobs = attach_distances(jobs, distances)
+        fast = self.fast_serializer()
+        if fast is not None:
+            return fast.serialize(jobs)
+        return self.get_serializer(jobs, many=True).data
+
+    def get_queryset(self):
+        return self.job_rows(super().get_queryset())
+
+    def conditional_collection(self, request, name, build):
+        """
+        ETag z watermarku danych; przy pasującym If-None-Match 304 bez zapytań o oferty.
+        Bez Last-Modified: max(updated_at) nie zmienia się po usunięciu oferty.
+        """
+        return conditional(request, make_etag(request, name, watermark()), None, build)
+
+    def cached_response(self, request, name, compute):
+        """Odpowiedź z cached_data z ETagiem wersji danych faktycznie zwróconej (także starej, SWR)."""
+        data, mark = cached_data(request, name, compute)
+        response = Response(data, status=status.HTTP_200_OK)
+        response['ETag'] = make_etag(request, name, mark)
+        return response
+
     def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-
-        # Dodatkowy filtr: promień od wybranego miasta (?city=Poznań&radius_km=25)
-        city_name = request.query_params.get('city')
-        radius_km = request.query_params.get('radius_km')
-        if city_name and radius_km:
-            try:
-                radius = float(radius_km)
-            except ValueError:
-                radius = None
-            if radius and radius > 0:
-                base_dir = Path(settings.BASE_DIR)
-                cities_path = base_dir / 'jobs' / 'data' / 'cities.json'
-                if cities_path.exists():
-                    with cities_path.open('r', encoding='utf-8') as f:
-                        cities = json.load(f)
-                    city = next((c for c in cities if c['name'].lower() == city_name.lower()), None)
-                    if city:
-                        clat, clon = float(city['lat']), float(city['lon'])
-                        in_radius_ids = []
-                        for j in queryset:
-                            if j.latitude is None or j.longitude is None:
-                                continue
-                            d = haversine_km(clat, clon, j.latitude, j.longitude)
-                            if d is not None and d <= radius:
-                                in_radius_ids.append(j.id)
-                        queryset = queryset.filter(id__in=in_radius_ids)
+        return self.conditional_collection(
+            request, 'list', lambda: self.cached_response(request, 'list', lambda: self.list_data(request))
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            updated_at = Job.objects.filter(pk=kwargs['pk']).values_list('updated_at', flat=True).first()
+        except (TypeError, ValueError):
+            updated_at = None
+        if updated_at is None:
+            return super().retrieve(request, *args, **kwargs)  # 404
+        etag = make_etag(request, 'retrieve', (kwargs['pk'], updated_at.isoformat()))
+        return conditional(request, etag, updated_at, lambda: super(JobViewSet, self).retrieve(request, *args, **kwargs))
+
+    def filter_radius(self, request, queryset):
+        """Dodatkowy filtr: promień od wybranego miasta (?city=Poznań&radius_km=25) -> (queryset, dystanse|None)."""
+        center = radius_center(request.query_params)
+        if center is None:
+            return queryset, None
+        distances = distances_within_radius(queryset, *center)
+        return queryset.filter(id__in=list(distances)), distances
+
+    def list_data(self, request):
+        queryset, distances = self.filter_radius(request, self.filter_queryset(self.get_queryset()))
 
         page = self.paginate_queryset(queryset)
         if page is not None:
-            ser = self.get_serializer(page, many=True)
-            return self.get_paginated_response(ser.data)
-        ser = self.get_serializer(queryset, many=True)
-        return Response(ser.data)
+            return self.get_paginated_response(self.serialize_jobs(page, distances)).data
+        return self.serialize_jobs(queryset, distances)
 
     @action(detail=False, methods=['get'], url_path='featured', permission_classes=[permissions.AllowAny])
     def featured(self, request):
-        qs = Job.objects.all().order_by('-salary_max', '-posted_at', '-created_at')[:10]
-        return Response(self.get_serializer(qs, many=True).data, status=status.HTTP_200_OK)
+        def compute():
+            qs = self.job_rows(Job.objects.order_by('-salary_max', '-posted_at', '-created_at'))[:10]
+            return self.serialize_jobs(qs)
+        return self.conditional_collection(
+            request, 'featured', lambda: self.cached_response(request, 'featured', compute)
+        )
 
     @action(detail=False, methods=['get'], url_path='nearby', permission_classes=[permissions.AllowAny])
     def nearby(self, request):
-        # /api/jobs/nearby/?lat=...&lon=...&radius_km=...
+        # /api/jobs/nearby/?lat=...&lon=...&radius_km=...[&sort=distance][&limit=50]
         try:
             lat = float(request.query_params.get('lat'))
             lon = float(request.query_params.get('lon'))
             radius = float(request.query_params.get('radius_km', 10))
         except (TypeError, ValueError):
             return Response({'detail': 'lat, lon, radius_km są wymagane i muszą być liczbami'}, status=400)
+        try:
+            limit = int(request.query_params.get('limit', 0))
+        except ValueError:
+            limit = -1
+        if limit < 0:
+            return Response({'detail': 'limit musi być liczbą całkowitą dodatnią'}, status=400)
 
-        ids = []
-        for j in Job.objects.exclude(latitude__isnull=True).exclude(longitude__isnull=True):
-            d = haversine_km(lat, lon, j.latitude, j.longitude)
-            if d is not None and d <= radius:
-                ids.append(j.id)
-        qs = Job.objects.filter(id__in=ids).order_by('-posted_at', '-created_at')
-        return Response(self.get_serializer(qs, many=True).data, status=200)
+        def build():
+            distances = distances_within_radius(Job.objects.all(), lat, lon, radius)
+            if limit:
+                # top-K najbliższych bez sortowania całego zbioru w promieniu
+                distances = {pk: distances[pk] for pk in heapq.nsmallest(limit, distances, key=distances.get)}
+
+            qs = self.job_rows(Job.objects.filter(id__in=list(distances)))
+            if request.query_params.get('sort') == 'distance':
+                jobs = sorted(qs, key=lambda j: (distances[job_id(j)], job_id(j)))
+            else:
+                jobs = qs.order_by('-posted_at', '-created_at')
+            return Response(self.serialize_jobs(jobs, distances), status=200)
+        return self.conditional_collection(request, 'nearby', build)
+
+    @action(detail=False, methods=['get'], url_path='changes', permission_classes=[permissions.AllowAny])
+    def changes(self, request):
+        # /api/jobs/changes/[?since=<kursor>][&limit=500] - patrz jobs/sync.py
+        default = getattr(settings, 'JOBS_SYNC_PAGE_SIZE', 500)
+        try:
+            limit = int(request.query_params.get('limit', default))
+        except ValueError:
+            limit = 0
+        if not 0 < limit <= 2000:
+            return Response({'detail': 'limit musi być liczbą od 1 do 2000'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            ids, deleted, cursor, has_more = changes(request.query_params.get('since'), limit)
+        except InvalidCursor as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except CursorExpired as e:
+            return Response({'detail': str(e), 'full_sync': True}, status=status.HTTP_410_GONE)
+
+        rows = {job_id(j): j for j in self.job_rows(Job.objects.filter(id__in=ids))}
+        return Response({
+            'changed': self.serialize_jobs([rows[pk] for pk in ids if pk in rows]),
+            'deleted': deleted,
+            'cursor': cursor,
+            'has_more': has_more,
+        })
+
+    @action(detail=False, methods=['get'], url_path='export', renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request):
+        # /api/jobs/export/?format=csv&city=Łódź... - te same filtry co lista, bez paginacji, strumieniowo
+        queryset = self.filter_queryset(Job.objects.order_by('id'))
+        # promień: prostokąt w bazie, dokładny dystans na paczkach strumienia (bez listy id w SQL)
+        center = radius_center(request.query_params)
+        if center is not None:
+            queryset = within_bounding_box(queryset, *center)
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            stream_export(queryset, renderer.format, within=center),
+            content_type=f'{renderer.media_type}; charset=utf-8',
+        )
+        response['Content-Disposition'] = f'attachment; filename="jobs.{renderer.format}"'
+        return response
+
+    @action(detail=False, methods=['get'], url_path='facets', permission_classes=[permissions.AllowAny])
+    def facets(self, request):
+        # /api/jobs/facets/[?city=...&is_remote=...&search=...][&limit=50] - patrz jobs/facets.py
+        try:
+            limit = int(request.query_params.get('limit', facets_limit()))
+        except ValueError:
+            limit = 0
+        if not 0 < limit <= 500:
+            return Response({'detail': 'limit musi być liczbą od 1 do 500'}, status=status.HTTP_400_BAD_REQUEST)
+        filter_params = set(JobFilter.base_filters) | {FullTextSearchFilter.search_param, 'radius_km'}
+        filtered = any(request.query_params.get(key) for key in filter_params)
+
+        def compute():
+            if not filtered:
+                return stored_facets(limit)  # tabela JobFacetCount, przeliczana okresowo
+            queryset, _ = self.filter_radius(request, self.filter_queryset(Job.objects.all()))
+            return format_facets(compute_facets(queryset), queryset.order_by().count(), limit)
+        return self.conditional_collection(request, 'facets', lambda: self.cached_response(request, 'facets', compute))
 
     @action(detail=True, methods=['post'], url_path='apply')
     def apply(self, request, pk=None):
@@ -123,9 +330,21 @@ class JobViewSet(viewsets.ReadOnlyModelViewSet):
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def cities_list(request):
-    base_dir = Path(settings.BASE_DIR)
-    cities_path = base_dir / 'jobs' / 'data' / 'cities.json'
-    if not cities_path.exists():
-        return Response([], status=200)
-    with cities_path.open('r', encoding='utf-8') as f:
-        return Response(json.load(f), status=200)
+    # /api/cities/?q=pozn&limit=12 -> podpowiedzi; bez parametrów pełna lista
+    q = request.query_params.get('q')
+    limit = request.query_params.get('limit')
+    if q is not None or limit is not None:
+        try:
+            limit = int(limit) if limit is not None else 12
+        except ValueError:
+            return Response({'detail': 'limit musi być liczbą całkowitą'}, status=status.HTTP_400_BAD_REQUEST)
+        blob, etag = gazetteer.blob()
+        return conditional(
+            request, make_etag(request, 'cities', etag), gazetteer.last_modified(),
+            lambda: Response(gazetteer.suggest(q or '', limit), status=200),
+        )
+
+    blob, etag = gazetteer.blob()
+    return conditional(
+        request, etag, gazetteer.last_modified(), lambda: HttpResponse(blob, content_type='application/json')
+    )
@@ -0,0 +1,6 @@
+try:
+    from .celery import app as celery_app
+except ImportError:  # celery jest opcjonalny - bez niego działają tylko komendy zarządzania
+    celery_app = None
+
+__all__ = ('celery_app',)
@@ -1,7 +1,18 @@
+"""
+Aplikacja Celery projektu. Zadania (jobs/tasks.py) mają osobne kolejki, żeby każdą
+obsługiwał worker o dopasowanej współbieżności, np.:
+
+    celery -A myproject worker -Q scrape -c 2 --prefetch-multiplier 1   # przeglądarki są ciężkie
+    celery -A myproject worker -Q geocode -c 1                          # limit Nominatim: 1 zapytanie/s
+    celery -A myproject worker -Q ingest -c 1
+    celery -A myproject beat                                            # odświeżanie starych ofert
+
+Konfiguracja: ustawienia CELERY_* w settings.py.
+"""
 import os
 from celery import Celery
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
-app = Celery('project')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myproject.settings')
+app = Celery('myproject')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
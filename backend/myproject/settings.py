@@ -62,6 +62,8 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',  # w produkcji zmień na PostgreSQL
         'NAME': BASE_DIR / 'db.sqlite3',
+        # migracje jobs powstają przy wdrożeniu (init_db), więc baza testowa powstaje wprost z modeli
+        'TEST': {'MIGRATE': False},
     }
 }
 
@@ -92,6 +94,68 @@ REST_FRAMEWORK = {
     ],
 }
 
+# /api/jobs/changes/: ofert na odpowiedź i jak długo trzymać ślady usunięć (= ważność kursora)
+JOBS_SYNC_PAGE_SIZE = 500
+JOBS_TOMBSTONE_DAYS = int(os.environ.get('JOBS_TOMBSTONE_DAYS', '30'))
+
+# /api/jobs/facets/: wartości miast/województw na odpowiedź; tabela JobFacetCount (bez filtrów)
+# jest przeliczana co JOBS_FACETS_REFRESH_MINUTES przez Celery beat
+JOBS_FACETS_LIMIT = 50
+JOBS_FACETS_REFRESH_MINUTES = int(os.environ.get('JOBS_FACETS_REFRESH_MINUTES', '10'))
+
+# Cache: Redis, gdy podano REDIS_URL, w przeciwnym razie pamięć procesu. Przy LocMemCache zmiany
+# z innych procesów (Celery, komendy) widać w API dopiero po JOBS_CACHE_TIMEOUT.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    } if os.environ.get('REDIS_URL') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+# Czas życia odpowiedzi featured/list w cache (jobs/cache.py); 0 = bez cache
+JOBS_CACHE_TIMEOUT = int(os.environ.get('JOBS_CACHE_TIMEOUT', '300'))
+
+# Rozmiar strony listy ofert (?page_size= nadpisuje, maks. JobKeysetPagination.max_page_size)
+JOBS_PAGE_SIZE = 20
+
+# Szybka serializacja list ofert z .values() + orjson (jobs/fast.py)
+JOBS_FAST_SERIALIZER = os.environ.get('JOBS_FAST_SERIALIZER', '') == '1'
+
+# Magazyn surowego HTML scrapowanych stron (jobs/management/commands/capture.py); pusty = wyłączony
+JOBS_CAPTURE_DIR = os.environ.get('JOBS_CAPTURE_DIR', '')
+JOBS_CAPTURE_MAX_MB = int(os.environ.get('JOBS_CAPTURE_MAX_MB', '200'))
+JOBS_CAPTURE_SAMPLE = float(os.environ.get('JOBS_CAPTURE_SAMPLE', '0.01'))
+
+# Celery (myproject/celery.py, jobs/tasks.py). Domyślny broker filesystem:// nie wymaga
+# zewnętrznej usługi (jeden host); w produkcji ustaw CELERY_BROKER_URL, np. redis://.
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'filesystem://')
+CELERY_BROKER_DIR = os.environ.get('CELERY_BROKER_DIR', str(BASE_DIR / '.celery'))
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'data_folder_in': CELERY_BROKER_DIR,
+    'data_folder_out': CELERY_BROKER_DIR,
+} if CELERY_BROKER_URL.startswith('filesystem') else {}
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_TASK_ROUTES = {
+    'jobs.tasks.scrape_offer': {'queue': 'scrape'},
+    'jobs.tasks.refresh_stale_offers': {'queue': 'scrape'},
+    'jobs.tasks.geocode_job': {'queue': 'geocode'},
+    'jobs.tasks.geocode_jobs': {'queue': 'geocode'},
+    'jobs.tasks.geocode_missing': {'queue': 'geocode'},
+    'jobs.tasks.ingest_file': {'queue': 'ingest'},
+}
+CELERY_BEAT_SCHEDULE = {
+    'refresh-stale-offers': {'task': 'jobs.tasks.refresh_stale_offers', 'schedule': 60 * 60},
+    'geocode-missing': {'task': 'jobs.tasks.geocode_missing', 'schedule': 6 * 60 * 60},
+    'prune-tombstones': {'task': 'jobs.tasks.prune_tombstones', 'schedule': 24 * 60 * 60},
+    'refresh-facets': {'task': 'jobs.tasks.refresh_facets', 'schedule': JOBS_FACETS_REFRESH_MINUTES * 60},
+}
+# Oferty sprawdzane dawniej niż JOBS_REFRESH_AFTER_HOURS są ponownie scrapowane (najwyżej
+# JOBS_REFRESH_BATCH na jedno uruchomienie refresh_stale_offers)
+JOBS_REFRESH_AFTER_HOURS = int(os.environ.get('JOBS_REFRESH_AFTER_HOURS', '24'))
+JOBS_REFRESH_BATCH = int(os.environ.get('JOBS_REFRESH_BATCH', '500'))
+
 CORS_ALLOW_ALL_ORIGINS = True
 
 SIMPLE_JWT = {
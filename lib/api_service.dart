@@ -15,6 +15,7 @@ import 'job_offer.dart';
 /// Zachowuje zgodność z istniejącym interfejsem, dodaje kilka helperów:
 /// - suggestCities(query)  -> List<String>
 /// - search(params)        -> proxy do fetchOffers
+/// - fetchMoreOffers()     -> kolejna strona wyników (kursor "next")
 /// - setSearchPrefs(...)   -> lokalne preferencje wyszukiwania
 ///
 /// Nie ruszam mechanizmu autoryzacji (tokeny) — logika została zachowana,
@@ -47,12 +48,23 @@ class ApiService extends ChangeNotifier {
   final List<JobOffer> _cache = [];
   final List<JobOffer> _savedOffers = [];
 
+  // kursor następnej strony /api/jobs/ (pole "next" odpowiedzi); null = koniec listy
+  Uri? _nextOffersUri;
+  bool _loadingMoreOffers = false;
+
+  // ETag i treść ostatniej odpowiedzi 200 per URL - do warunkowych GET (304 Not Modified)
+  static const int _maxConditionalEntries = 32;
+  final Map<String, String> _etags = {};
+  final Map<String, List<int>> _bodies = {};
+
   bool get isLoggedIn => (_access != null && _access!.isNotEmpty);
   bool get online => _online;
   bool get notificationsEnabled => _notificationsEnabled;
   String? get username => _username;
   List<JobOffer> get cache => List.unmodifiable(_cache);
   List<JobOffer> get savedOffers => List.unmodifiable(_savedOffers);
+  bool get hasMoreOffers => _online && _nextOffersUri != null;
+  bool get loadingMoreOffers => _loadingMoreOffers;
 
   int get searchRadiusKm => _searchRadiusKm;
   bool get searchRemoteOnly => _searchRemoteOnly;
@@ -254,6 +266,7 @@ class ApiService extends ChangeNotifier {
       _cache
         ..clear()
         ..addAll(box.values);
+      _nextOffersUri = null;
       notifyListeners();
       return _cache;
     }
@@ -269,24 +282,13 @@ class ApiService extends ChangeNotifier {
     if (radiusKm != null && radiusKm > 0) params['radius_km'] = '$radiusKm';
 
     final uri = Uri.parse('$baseUrl$jobsPath').replace(queryParameters: params);
-
-    var res = await http.get(uri, headers: _defaultHeaders());
-    if (res.statusCode == 401 && _refresh != null && _refresh!.isNotEmpty) {
-      await _refreshAccessToken();
-      res = await http.get(uri, headers: _defaultHeaders());
-    }
-    if (res.statusCode != 200) {
-      throw Exception('Błąd HTTP ${res.statusCode}: ${utf8.decode(res.bodyBytes)}');
-    }
-
-    final data = jsonDecode(utf8.decode(res.bodyBytes)) as List<dynamic>;
-    final now = DateTime.now();
+    final page = await _fetchOffersPage(uri);
 
     // update local hive cache
     await box.clear();
     _cache
       ..clear()
-      ..addAll(data.map((m) => JobOffer.fromMap(m as Map<String, dynamic>, fetchedAt: now)));
+      ..addAll(page);
     for (final j in _cache) {
       await box.put(j.id, j);
     }
@@ -296,12 +298,56 @@ class ApiService extends ChangeNotifier {
     return _cache;
   }
 
+  /// Dociąga kolejną stronę wyników ostatniego fetchOffers (kursor z pola "next")
+  /// i dopisuje ją do cache. Bez następnej strony (albo offline) nic nie robi.
+  Future<List<JobOffer>> fetchMoreOffers() async {
+    final uri = _nextOffersUri;
+    if (uri == null || !_online || _loadingMoreOffers) return _cache;
+    _loadingMoreOffers = true;
+    notifyListeners();
+    try {
+      final page = await _fetchOffersPage(uri);
+      final known = _cache.map((j) => j.id).toSet();
+      final fresh = page.where((j) => !known.contains(j.id)).toList();
+      _cache.addAll(fresh);
+      if (Hive.isBoxOpen('job_offers')) {
+        final box = Hive.box<JobOffer>('job_offers');
+        for (final j in fresh) {
+          await box.put(j.id, j);
+        }
+      }
+      await _syncSavedWithCache();
+    } finally {
+      _loadingMoreOffers = false;
+      notifyListeners();
+    }
+    return _cache;
+  }
+
+  /// Jedna strona /api/jobs/ ({"next": ..., "results": [...]}); zapamiętuje kursor następnej.
+  Future<List<JobOffer>> _fetchOffersPage(Uri uri) async {
+    var res = await _conditionalGet(uri);
+    if (res.statusCode == 401 && _refresh != null && _refresh!.isNotEmpty) {
+      await _refreshAccessToken();
+      res = await _conditionalGet(uri);
+    }
+    if (res.statusCode != 200) {
+      throw Exception('Błąd HTTP ${res.statusCode}: ${utf8.decode(res.bodyBytes)}');
+    }
+
+    final decoded = jsonDecode(utf8.decode(res.bodyBytes));
+    final data = (decoded is Map ? decoded['results'] : decoded) as List<dynamic>;
+    final next = decoded is Map ? decoded['next'] as String? : null;
+    // z linku bierzemy tylko query - host w nim to ten, który widział backend (np. za proxy)
+    _nextOffersUri = next == null ? null : Uri.parse('$baseUrl$jobsPath').replace(query: Uri.parse(next).query);
+
+    final now = DateTime.now();
+    return data.map((m) => JobOffer.fromMap(m as Map<String, dynamic>, fetchedAt: now)).toList();
+  }
+
   /// Endpoint to fetch featured offers (used on home)
   Future<List<JobOffer>> fetchFeaturedJobs() async {
-    final res = await http.get(
-      Uri.parse('$baseUrl/api/jobs/featured/'),
-      headers: _defaultHeaders(),
-    );
+    final res = await _conditionalGet(Uri.parse('$baseUrl/api/jobs/featured/'));
     if (res.statusCode != 200) {
       throw Exception('Błąd pobierania polecanych ofert: ${res.statusCode}');
     }
@@ -321,7 +367,7 @@ class ApiService extends ChangeNotifier {
       'lon': '$lon',
       'radius_km': '$radiusKm',
     });
-    final res = await http.get(uri, headers: _defaultHeaders());
+    final res = await _conditionalGet(uri);
     if (res.statusCode != 200) {
       throw Exception('Błąd pobierania ofert w pobliżu: ${res.statusCode}');
     }
@@ -332,10 +378,7 @@ class ApiService extends ChangeNotifier {
 
   /// Fetch cities endpoint (used optionally by advanced search)
   Future<List<Map<String, dynamic>>> fetchCities() async {
-    final res = await http.get(
-      Uri.parse('$baseUrl/api/cities/'),
-      headers: _defaultHeaders(),
-    );
+    final res = await _conditionalGet(Uri.parse('$baseUrl/api/cities/'));
     if (res.statusCode != 200) {
       throw Exception('Błąd pobierania miast: ${res.statusCode}');
     }
@@ -473,6 +516,34 @@ class ApiService extends ChangeNotifier {
     notifyListeners();
   }
 
+  /// GET z If-None-Match; przy 304 zwraca zapamiętaną treść jako zwykłą odpowiedź 200,
+  /// więc wywołujący nie musi rozróżniać obu przypadków.
+  Future<http.Response> _conditionalGet(Uri uri) async {
+    final key = uri.toString();
+    final headers = _defaultHeaders();
+    final etag = _etags[key];
+    if (etag != null && _bodies.containsKey(key)) headers['If-None-Match'] = etag;
+
+    final res = await http.get(uri, headers: headers);
+    final cached = _bodies[key];
+    if (res.statusCode == 304 && cached != null) {
+      return http.Response.bytes(cached, 200, headers: res.headers, request: res.request);
+    }
+    final newEtag = res.headers['etag'];
+    if (res.statusCode == 200 && newEtag != null) {
+      _etags.remove(key);
+      _bodies.remove(key);
+      if (_etags.length >= _maxConditionalEntries) {
+        final oldest = _etags.keys.first;
+        _etags.remove(oldest);
+        _bodies.remove(oldest);
+      }
+      _etags[key] = newEtag;
+      _bodies[key] = res.bodyBytes;
+    }
+    return res;
+  }
+
   Map<String, String> _defaultHeaders({bool withJson = false}) {
     final h = <String, String>{'Accept': 'application/json; charset=utf-8'};
     if (withJson) h['Content-Type'] = 'application/json; charset=utf-8';
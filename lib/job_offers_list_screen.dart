@@ -40,6 +40,15 @@ class _JobOffersListScreenState extends State<JobOffersListScreen> {
     await context.read<ApiService>().fetchOffers(q: q);
   }
 
+  Future<void> _loadMoreOffers() async {
+    try {
+      await context.read<ApiService>().fetchMoreOffers();
+    } catch (e) {
+      if (!mounted) return;
+      ScaffoldMessenger.of(context).showSnackBar(SnackBar(content: Text('Nie udało się pobrać kolejnych ofert: $e')));
+    }
+  }
+
   @override
   Widget build(BuildContext context) {
     final api = context.watch<ApiService>();
@@ -135,6 +144,15 @@ class _JobOffersListScreenState extends State<JobOffersListScreen> {
                 ),
               );
             }).toList(),
+          if (api.hasMoreOffers)
+            Padding(
+              padding: const EdgeInsets.symmetric(vertical: 12),
+              child: Center(
+                child: api.loadingMoreOffers
+                    ? const CircularProgressIndicator()
+                    : OutlinedButton.icon(icon: const Icon(Icons.expand_more), label: const Text('Pokaż więcej'), onPressed: _loadMoreOffers),
+              ),
+            ),
         ]),
       ),
     );